@@ -1,12 +1,34 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, redirect, request, jsonify, stream_with_context
 from flask_cors import CORS
+from flask_limiter import Limiter
+from limits import parse as parse_rate_limit
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import datetime, timedelta
-from scripts.scrape_booking_dot_com_hotels import scrape_booking_hotel
-from scripts.scrape_trip_dot_com_hotels import scrape_trip_hotel
+from concurrent.futures import as_completed
+from scripts.scrape_booking_dot_com_hotels import provider as booking_provider
+from scripts.scrape_trip_dot_com_hotels import provider as trip_provider
+from scripts.scraping_engine import get_pool_stats, get_provider, scrape_hotel, scrape_hotel_dates, scrape_listing
+from scripts.result_cache import QuoteCache, canonical_hotel_url, make_cache_key
+from scripts.single_flight import SingleFlight
+from scripts.jobs import BoundedExecutor, JobManager, QueueFull, FINISHED_STATES
+from scripts.http_fetch import get_fast_path_stats
+from scripts.debug_capture import get_capture_stats
+from scripts.prewarmer import Prewarmer, PREWARM_ENABLED
+from scripts.price_history import PriceHistoryStore
+from scripts.site_health import get_site_health_stats, resolve_deadline
+from scripts.fx_rates import FxRateTable
+from scripts.stub_scraper import get_stub_stats
+from scripts.admission import AdmissionController, Overloaded, validate_destination_request, validate_scrape_request
+from scripts.hotel_matching import HotelMatchIndex, listing_city, name_similarity
+from scripts.http_caching import CANONICAL_REDIRECT_MAX_AGE, apply_cache_headers, canonical_query, compress_response
+from scripts.metrics import ADMISSION_REJECTIONS, CACHE_LOOKUPS, HTTP_LATENCY, HTTP_REQUESTS, METRICS_ENABLED, GaugeCallback, render_metrics
+from threading import Lock
 import sys
 from pathlib import Path
+import json
+import math
+import time
 import logging
-from threading import Lock
 import os 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -24,16 +46,105 @@ allowed_origins = [
 if os.getenv("RENDER") or os.getenv("VERCEL"):
     allowed_origins.append("https://travelaz.vercel.app")  
     logger.info("Production environment detected. Allowing Vercel origin.")
+    # One proxy in front of the app: take the client address it appends, not one the client sent
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+
+quote_cache = QuoteCache()
+scrape_flight = SingleFlight()
+scrape_jobs = JobManager()
+price_store = PriceHistoryStore()
+revalidations = {}
+revalidations_lock = Lock()
+fx_table = FxRateTable()
+SITES = (booking_provider.name, trip_provider.name)
+hotel_index = HotelMatchIndex()
+
+SSE_HEARTBEAT_SECONDS = 15
+COMPARE_MAX_HOTELS = int(os.getenv("COMPARE_MAX_HOTELS", 50))
+CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", 31))
+CALENDAR_DEADLINE_SECONDS = float(os.getenv("CALENDAR_DEADLINE_SECONDS", 90))
+DESTINATION_DEADLINE_SECONDS = float(os.getenv("DESTINATION_DEADLINE_SECONDS", 90))
+RATE_LIMIT_PER_CLIENT = os.getenv("RATE_LIMIT_PER_CLIENT", "30/minute")
+RATE_LIMIT_PER_HOTEL = os.getenv("RATE_LIMIT_PER_HOTEL", "6/minute")
+SCRAPE_QUERY_FIELDS = ('hotelUrl', 'checkIn', 'checkOut', 'adults', 'children', 'rooms', 'child_ages', 'currency', 'deadlineSeconds', 'swr')
+admission = AdmissionController(get_pool_stats)
+limiter = Limiter(
+    lambda: request.remote_addr or "unknown",
+    app=app,
+    storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://"),
+    strategy="moving-window",
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+)
+hotel_rate_limit = parse_rate_limit(RATE_LIMIT_PER_HOTEL)
+compare_executor = BoundedExecutor(
+    int(os.getenv("COMPARE_WORKERS", 8)), int(os.getenv("COMPARE_MAX_PENDING", 200)), "compare"
+)
 
 CORS(app, resources={
     r"/scrape-*": {
+        "origins": allowed_origins,
+        "methods": ["GET", "POST", "OPTIONS"],
+        "allow_headers": ["Content-Type"]
+    },
+    r"/compare": {
+        "origins": allowed_origins,
+        "methods": ["POST", "OPTIONS"],
+        "allow_headers": ["Content-Type"]
+    },
+    r"/price-history": {
+        "origins": allowed_origins,
+        "methods": ["GET", "OPTIONS"],
+        "allow_headers": ["Content-Type"]
+    },
+    r"/scrape-destination": {
+        "origins": allowed_origins,
+        "methods": ["POST", "OPTIONS"],
+        "allow_headers": ["Content-Type"]
+    },
+    r"/price-calendar": {
         "origins": allowed_origins,
         "methods": ["POST", "OPTIONS"],
         "allow_headers": ["Content-Type"]
+    },
+    r"/fx-rates": {
+        "origins": allowed_origins,
+        "methods": ["GET", "OPTIONS"],
+        "allow_headers": ["Content-Type"]
+    },
+    r"/hotel-matches": {
+        "origins": allowed_origins,
+        "methods": ["GET", "POST", "OPTIONS"],
+        "allow_headers": ["Content-Type"]
+    },
+    r"/jobs/*": {
+        "origins": allowed_origins,
+        "methods": ["GET", "POST", "OPTIONS"],
+        "allow_headers": ["Content-Type"]
     }
 })
 
-request_lock = Lock()
+GaugeCallback(
+    "travelaz_browser_pool", "Browser pool drivers by state", ("state",),
+    lambda: {state: get_pool_stats()[state] for state in ("idle", "in_use", "queue_depth")}
+)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streaming routes (/compare, SSE) are timed to their first byte, not to the end of the stream
+    if METRICS_ENABLED and request.path != '/metrics':
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        HTTP_LATENCY.observe(time.perf_counter() - g.get('request_started', time.perf_counter()), endpoint=endpoint)
+    return response
+
+@app.after_request
+def compress(response):
+    # Streamed responses (/compare, SSE) pass through untouched
+    return compress_response(response, request.accept_encodings)
 
 @app.route('/')
 def home():
@@ -42,125 +153,596 @@ def home():
         "environment": "production" if os.getenv("RENDER") else "development",
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "endpoints": {
-            "scrape-booking": "POST /scrape-booking",
-            "scrape-trip": "POST /scrape-trip"
+            "scrape-booking": "GET|POST /scrape-booking",
+            "scrape-trip": "GET|POST /scrape-trip",
+            "scrape-destination": "POST /scrape-destination",
+            "pool-status": "GET /pool-status",
+            "cache-status": "GET /cache-status",
+            "compare": "POST /compare",
+            "jobs-scrape-booking": "POST /jobs/scrape-booking",
+            "jobs-scrape-trip": "POST /jobs/scrape-trip",
+            "job-status": "GET /jobs/<job_id>",
+            "job-events": "GET /jobs/<job_id>/events",
+            "price-history": "GET /price-history?hotelUrl=...",
+            "price-calendar": "POST /price-calendar",
+            "fx-rates": "GET /fx-rates",
+            "hotel-matches": "GET /hotel-matches?city=...[&site=...&hotelUrl=...], POST /hotel-matches",
+            "metrics": "GET /metrics"
         },
         "docs": "https://github.com/putumani/travelaz"  
     }), 200
 
-@app.route('/scrape-booking', methods=['POST', 'OPTIONS'])
+@app.route('/pool-status')
+def pool_status():
+    return jsonify({
+        "pid": os.getpid(),
+        "browser": get_pool_stats(),
+        "sites": get_site_health_stats(),
+        "http_fast_path": get_fast_path_stats(),
+        "debug_capture": get_capture_stats(),
+        "stub_scraper": get_stub_stats()
+    }), 200
+
+@app.route('/cache-status')
+def cache_status():
+    return jsonify({
+        "quote_cache": quote_cache.stats(),
+        "single_flight": scrape_flight.stats(),
+        "jobs": scrape_jobs.stats(),
+        "prewarmer": prewarmer.stats(),
+        "price_history": price_store.stats(),
+        "fx_rates": fx_table.stats(),
+        "admission": admission.stats(),
+        "compare_executor": {
+            "pending": compare_executor.pending(),
+            "max_pending": compare_executor.max_pending,
+            "rejected": compare_executor.rejected
+        },
+        "hotel_index": hotel_index.stats()
+    }), 200
+
+@app.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+def _is_preflight():
+    return request.method == 'OPTIONS'
+
+def _shed_payload(source, message, retry_after):
+    payload = {"success": False, "error": message, "retry_after": retry_after}
+    if source:
+        payload["fallback_data"] = get_fallback_data(source)
+    return payload
+
+def _shed_response(source, message, retry_after, status_code):
+    response, status_code = _build_cors_response(_shed_payload(source, message, retry_after), status_code)
+    response.headers['Retry-After'] = str(retry_after)
+    return response, status_code
+
+def _queue_full_response(source, error):
+    ADMISSION_REJECTIONS.inc(reason="queue_full")
+    return _shed_response(source, f"Too many scrapes waiting ({str(error)}), please try again shortly", _retry_after(), 503)
+
+def _retry_after():
+    return max(1, math.ceil(admission.estimate()[0]))
+
+SOURCE_BY_PATH = {
+    "/scrape-booking": "Booking.com", "/scrape-trip": "Trip.com",
+    "/jobs/scrape-booking": "Booking.com", "/jobs/scrape-trip": "Trip.com"
+}
+
+@app.errorhandler(429)
+def handle_rate_limited(e):
+    source = SOURCE_BY_PATH.get(request.path)
+    ADMISSION_REJECTIONS.inc(reason="rate_limited")
+    reset_at = limiter.current_limit.reset_at if limiter.current_limit else time.time() + 60
+    return _shed_response(source, f"Rate limit exceeded ({e.description}), please try again shortly", max(1, int(reset_at - time.time())), 429)
+
+@app.route('/scrape-booking', methods=['GET', 'POST', 'OPTIONS'])
+@limiter.limit(RATE_LIMIT_PER_CLIENT, exempt_when=_is_preflight)
 def handle_scrape_booking_request():
+    return _handle_scrape_request("booking")
+
+@app.route('/scrape-trip', methods=['GET', 'POST', 'OPTIONS'])
+@limiter.limit(RATE_LIMIT_PER_CLIENT, exempt_when=_is_preflight)
+def handle_scrape_trip_request():
+    return _handle_scrape_request("trip")
+
+def _handle_scrape_request(site):
     if request.method == 'OPTIONS':
         response = jsonify({'status': 'preflight'})
         response.headers.add('Access-Control-Allow-Origin', '*')
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
-        response.headers.add('Access-Control-Allow-Methods', 'POST')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, POST')
         return response
 
+    source = get_provider(site).label
     try:
-        data = request.get_json()
+        data = _scrape_request_data()
 
         if not data or 'hotelUrl' not in data:
             logger.warning("Missing required field: hotelUrl")
             return _build_cors_response({
                 "success": False,
                 "error": "Missing required field: hotelUrl",
-                "fallback_data": get_fallback_data("Booking.com")
+                "fallback_data": get_fallback_data(source)
             }, 400)
 
-        with request_lock:
-            result = process_booking_request(data)
-
-        if 'error' in result:
-            logger.error(f"Booking.com scraping error: {result['error']}")
+        validation_error = validate_scrape_request(site, data)
+        if validation_error:
             return _build_cors_response({
                 "success": False,
-                "error": result['error'],
-                "fallback_data": get_fallback_data("Booking.com"),
-                "alternative_dates": result.get('alternative_dates', [])
-            })
+                "error": validation_error,
+                "fallback_data": get_fallback_data(source)
+            }, 400)
 
-        return _build_cors_response({
-            "success": True,
-            "data": {
-                "hotel_name": result.get('hotel_name', 'Unknown Hotel'),
-                "price": result.get('price', None),
-                "taxes": result.get('taxes', 0),
-                "currency": result.get('currency', 'ZAR'),
-                "check_in": result.get('checkin_date', data.get('checkIn')),
-                "check_out": result.get('checkout_date', data.get('checkOut')),
-                "occupants": int(data.get('adults', 2)) + int(data.get('children', 0)),
-                "availability": result.get('availability', 'Not available'),
-                "room_type": result.get('room_type', 'Standard Room'),
-                "source": "Booking.com",
-                "source_url": result.get('source_url', data['hotelUrl'])
-            }
-        })
+        canonical = _canonical_query_redirect()
+        if canonical is not None:
+            return canonical
+
+        if _wants_stale_while_revalidate(data):
+            stale = _serve_stale_while_revalidate(site, data)
+            if stale is not None:
+                return _build_quote_response(stale, 200, {})
+
+        result = process_quote_request(site, data, admit=True)
+        payload, status_code = build_scrape_payload(source, data, result)
+        return _build_quote_response(payload, status_code, result)
+
+    except Overloaded as e:
+        return _shed_response(source, str(e), e.retry_after, e.status_code)
 
     except Exception as e:
-        logger.error(f"Unexpected Booking.com error: {str(e)}")
+        logger.error(f"Unexpected {source} error: {str(e)}")
         return _build_cors_response({
             "success": False,
             "error": f"An unexpected error occurred: {str(e)}",
-            "fallback_data": get_fallback_data("Booking.com")
+            "fallback_data": get_fallback_data(source)
         }, 500)
 
-@app.route('/scrape-trip', methods=['POST', 'OPTIONS'])
-def handle_scrape_trip_request():
-    if request.method == 'OPTIONS':
-        response = jsonify({'status': 'preflight'})
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
-        response.headers.add('Access-Control-Allow-Methods', 'POST')
-        return response
+@app.route('/compare', methods=['POST'])
+@limiter.limit(RATE_LIMIT_PER_CLIENT, exempt_when=_is_preflight)
+def handle_compare_request():
+    data = request.get_json(silent=True)
+    hotels = data.get('hotels') if isinstance(data, dict) else None
+    if not isinstance(hotels, list) or not hotels:
+        logger.warning("Missing required field: hotels")
+        return _build_cors_response({"success": False, "error": "Missing required field: hotels"}, 400)
+    if len(hotels) > COMPARE_MAX_HOTELS:
+        return _build_cors_response({
+            "success": False,
+            "error": f"Too many hotels, at most {COMPARE_MAX_HOTELS} per request"
+        }, 400)
+
+    spec = {key: data[key] for key in COMPARE_SPEC_FIELDS if key in data}
+    # Every entry is checked before anything is queued, so a bad one cannot fail halfway through the stream
+    invalid = _invalid_comparisons(hotels, spec)
+    if invalid:
+        return _build_cors_response({
+            "success": False,
+            "error": f"{len(invalid)} invalid hotel {'entry' if len(invalid) == 1 else 'entries'}",
+            "invalid": invalid
+        }, 400)
+    logger.info(f"Comparing {len(hotels)} hotels: {spec.get('checkIn')} → {spec.get('checkOut')}")
 
+    # Queued up front, so a full executor is refused with a 503 before any of the response is sent
     try:
-        data = request.get_json()
+        submitted = _submit_comparisons(hotels, spec)
+    except QueueFull as e:
+        return _queue_full_response(None, e)
 
-        if not data or 'hotelUrl' not in data:
-            logger.warning("Missing required field: hotelUrl")
-            return _build_cors_response({
-                "success": False,
-                "error": "Missing required field: hotelUrl",
-                "fallback_data": get_fallback_data("Trip.com")
-            }, 400)
+    if request.args.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        def generate():
+            for comparison in _iter_comparisons(*submitted):
+                yield json.dumps(comparison) + "\n"
 
-        with request_lock:
-            result = process_trip_request(data)
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        origin = request.headers.get('Origin')
+        if origin in allowed_origins:
+            response.headers.add("Access-Control-Allow-Origin", origin)
+        return response
+
+    comparisons = sorted(_iter_comparisons(*submitted), key=lambda c: c['index'])
+    return _build_cors_response({"success": True, "results": comparisons})
+
+@app.route('/scrape-destination', methods=['POST'])
+@limiter.limit(RATE_LIMIT_PER_CLIENT, exempt_when=_is_preflight)
+def handle_destination_request():
+    data = request.get_json(silent=True)
+    if not data or 'listUrl' not in data:
+        logger.warning("Missing required field: listUrl")
+        return _build_cors_response({"success": False, "error": "Missing required field: listUrl"}, 400)
+    if data.get('site') not in SITES:
+        return _build_cors_response({"success": False, "error": "site must be one of: booking, trip"}, 400)
+    validation_error = validate_destination_request(data['site'], data)
+    if validation_error:
+        return _build_cors_response({"success": False, "error": validation_error}, 400)
+    try:
+        deadline = resolve_deadline(data.get('deadlineSeconds') or DESTINATION_DEADLINE_SECONDS)
+    except (TypeError, ValueError):
+        return _build_cors_response({"success": False, "error": "deadlineSeconds must be a number"}, 400)
 
+    try:
+        result = process_destination_request(data, deadline)
         if 'error' in result:
-            logger.error(f"Trip.com scraping error: {result['error']}")
-            return _build_cors_response({
-                "success": False,
-                "error": result['error'],
-                "fallback_data": get_fallback_data("Trip.com"),
-                "alternative_dates": result.get('alternative_dates', [])
+            logger.error(f"Destination scraping error: {result['error']}")
+            return _build_cors_response({"success": False, "error": result['error']})
+
+        currency = (data.get('currency') or 'USD').upper()
+        hotels = result['hotels']
+        hotel_list = []
+        for hotel, conversion in zip(hotels, convert_results(hotels, currency)):
+            price, taxes = conversion or (hotel.get('price'), hotel.get('taxes', 0))
+            hotel_list.append({
+                **hotel,
+                "price": price,
+                "taxes": taxes,
+                "currency": currency if conversion else hotel.get('currency'),
+                "native_price": hotel.get('price'),
+                "native_currency": hotel.get('currency')
             })
+        return _build_cors_response({
+            "success": True,
+            "site": data['site'],
+            "city": result.get('city'),
+            "search_url": result['search_url'],
+            "check_in": result['checkin_date'],
+            "check_out": result['checkout_date'],
+            "pages": result['pages'],
+            "count": len(hotel_list),
+            "hotels": hotel_list,
+            "errors": result['errors']
+        })
+    except Overloaded as e:
+        return _shed_response(None, str(e), e.retry_after, e.status_code)
+    except Exception as e:
+        logger.error(f"Unexpected destination scrape error: {str(e)}")
+        return _build_cors_response({"success": False, "error": f"An unexpected error occurred: {str(e)}"}, 500)
+
+@app.route('/jobs/scrape-booking', methods=['POST'])
+@limiter.limit(RATE_LIMIT_PER_CLIENT, exempt_when=_is_preflight)
+def enqueue_booking_job():
+    return _enqueue_scrape_job("booking")
+
+@app.route('/jobs/scrape-trip', methods=['POST'])
+@limiter.limit(RATE_LIMIT_PER_CLIENT, exempt_when=_is_preflight)
+def enqueue_trip_job():
+    return _enqueue_scrape_job("trip")
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        return _build_cors_response({"success": False, "error": "Job not found or expired"}, 404)
+    return _build_cors_response({"success": True, **job})
+
+@app.route('/jobs/<job_id>/events')
+def stream_job_events(job_id):
+    if scrape_jobs.get(job_id) is None:
+        return _build_cors_response({"success": False, "error": "Job not found or expired"}, 404)
+
+    def generate():
+        seen_version = -1
+        while True:
+            job, version = scrape_jobs.wait_for_change(job_id, seen_version, SSE_HEARTBEAT_SECONDS)
+            if job is None:
+                yield f"event: expired\ndata: {json.dumps({'job_id': job_id})}\n\n"
+                return
+            if version == seen_version:
+                yield ": keep-alive\n\n"
+                continue
+            seen_version = version
+            yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+            if job['status'] in FINISHED_STATES:
+                return
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    origin = request.headers.get('Origin')
+    if origin in allowed_origins:
+        response.headers.add("Access-Control-Allow-Origin", origin)
+    return response
+
+@app.route('/fx-rates')
+def get_fx_rates():
+    return _build_cors_response({"success": True, **fx_table.table()})
+
+@app.route('/price-history')
+def get_price_history():
+    hotel_url = request.args.get('hotelUrl')
+    if not hotel_url:
+        return _build_cors_response({"success": False, "error": "Missing required parameter: hotelUrl"}, 400)
 
+    site = request.args.get('site')
+    checkin_from = request.args.get('from')
+    checkin_to = request.args.get('to')
+    try:
+        limit = min(int(request.args.get('limit', 500)), 5000)
+    except ValueError:
+        return _build_cors_response({"success": False, "error": "limit must be an integer"}, 400)
+
+    return _build_cors_response({
+        "success": True,
+        "history": price_store.history(hotel_url, site, checkin_from, checkin_to, limit=limit),
+        "trend": price_store.trend(hotel_url, site, checkin_from, checkin_to)
+    })
+
+@app.route('/hotel-matches', methods=['GET', 'POST'])
+def get_hotel_matches():
+    # Cross-site matches among listings seen by destination scrapes, looked up by city
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        city, site, hotels = data.get('city'), data.get('site'), data.get('hotels')
+        if not city or site not in SITES or not isinstance(hotels, list):
+            return _build_cors_response({"success": False, "error": "city, site (booking or trip) and a hotels list are required"}, 400)
+        hotels = [hotel for hotel in hotels if isinstance(hotel, dict)]
         return _build_cors_response({
             "success": True,
-            "data": {
-                "hotel_name": result.get('hotel_name', 'Unknown Hotel'),
-                "price": result.get('price', None),
-                "taxes": result.get('taxes', 0),
-                "currency": result.get('currency', 'USD'),
-                "check_in": result.get('checkin_date', data.get('checkIn')),
-                "check_out": result.get('checkout_date', data.get('checkOut')),
-                "occupants": int(data.get('adults', 2)) + int(data.get('children', 0)),
-                "availability": result.get('availability', 'Not available'),
-                "room_type": result.get('room_type', 'Standard Room'),
-                "source": "Trip.com",
-                "source_url": result.get('source_url', data['hotelUrl'])
-            }
+            "matches": [
+                {"hotel_name": hotel.get('hotel_name'), "match": match}
+                for hotel, match in zip(hotels, hotel_index.match_names(city, site, hotels))
+            ]
         })
 
+    city = request.args.get('city')
+    if not city:
+        return _build_cors_response({"success": False, "error": "Missing required parameter: city"}, 400)
+    hotel_url = request.args.get('hotelUrl')
+    if not hotel_url:
+        return _build_cors_response({"success": True, "city": city, "pairs": hotel_index.pairs(city)})
+
+    site = request.args.get('site')
+    if site not in SITES:
+        return _build_cors_response({"success": False, "error": "site must be one of: booking, trip"}, 400)
+    match = hotel_index.match(city, site, hotel_url)
+    if match is None:
+        return _build_cors_response({"success": False, "error": f"{hotel_url} has not been indexed for {city}"}, 404)
+    return _build_cors_response({"success": True, "city": city, **match})
+
+@app.route('/price-calendar', methods=['POST'])
+@limiter.limit(RATE_LIMIT_PER_CLIENT, exempt_when=_is_preflight)
+def handle_price_calendar_request():
+    data = request.get_json(silent=True)
+    if not data or 'hotelUrl' not in data:
+        logger.warning("Missing required field: hotelUrl")
+        return _build_cors_response({"success": False, "error": "Missing required field: hotelUrl"}, 400)
+    if data.get('site') not in SITES:
+        return _build_cors_response({"success": False, "error": "site must be one of: booking, trip"}, 400)
+    try:
+        deadline = resolve_deadline(data.get('deadlineSeconds') or CALENDAR_DEADLINE_SECONDS)
+    except (TypeError, ValueError):
+        return _build_cors_response({"success": False, "error": "deadlineSeconds must be a number"}, 400)
+
+    try:
+        first = datetime.strptime(data.get('from', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d').date()
+        last = datetime.strptime(data['to'], '%Y-%m-%d').date() if data.get('to') else first + timedelta(days=13)
+        nights = int(data.get('nights', 1))
+    except ValueError:
+        return _build_cors_response({"success": False, "error": "Invalid date range, expected YYYY-MM-DD"}, 400)
+    days = (last - first).days + 1
+    if days < 1 or nights < 1:
+        return _build_cors_response({"success": False, "error": "'to' must not be before 'from' and nights must be positive"}, 400)
+    if days > CALENDAR_MAX_DAYS:
+        return _build_cors_response({
+            "success": False,
+            "error": f"Date range too long, at most {CALENDAR_MAX_DAYS} check-in dates per request"
+        }, 400)
+
+    stays = [
+        ((first + timedelta(days=offset)).strftime('%Y-%m-%d'), (first + timedelta(days=offset + nights)).strftime('%Y-%m-%d'))
+        for offset in range(days)
+    ]
+    try:
+        return _build_cors_response(build_price_calendar(data['site'], data, stays, nights, deadline))
+    except Overloaded as e:
+        return _shed_response(None, str(e), e.retry_after, e.status_code)
     except Exception as e:
-        logger.error(f"Unexpected Trip.com error: {str(e)}")
+        logger.error(f"Unexpected price calendar error: {str(e)}")
+        return _build_cors_response({"success": False, "error": f"An unexpected error occurred: {str(e)}"}, 500)
+
+def build_price_calendar(site, data, stays, nights, deadline=CALENDAR_DEADLINE_SECONDS):
+    provider = get_provider(site)
+    hotel_url = data['hotelUrl']
+    if not hotel_url.startswith(provider.url_prefix):
+        return {"success": False, "error": f"Invalid {provider.label} URL"}
+
+    currency = (data.get('currency') or 'USD').upper()
+    search = {
+        'adults': int(data.get('adults', 2)),
+        'children': int(data.get('children', 0)),
+        'rooms': int(data.get('rooms', 1)),
+        'currency': scrape_currency_for(site, currency),
+        'child_ages': data.get('child_ages') or ''
+    }
+    cache_keys = {stay: quote_cache_key(site, hotel_url, stay[0], stay[1], **search) for stay in stays}
+    results = {}
+    for stay, cache_key in cache_keys.items():
+        cached = quote_cache.get(cache_key)
+        CACHE_LOOKUPS.inc(site=site, result="miss" if cached is None else "hit")
+        if cached is not None:
+            results[stay] = cached
+    misses = [stay for stay in stays if stay not in results]
+    logger.info(f"{provider.label} price calendar: {len(stays)} dates, {len(misses)} to scrape")
+
+    if misses:
+        _admit_scrape(site, hotel_url, deadline)
+        scraped = scrape_hotel_dates(site, hotel_url, misses, **search, deadline=deadline)
+        quoted = [(stay, result) for stay, result in scraped.items() if 'availability' in result]
+        quote_cache.set_many([(cache_keys[stay], result) for stay, result in quoted])
+        price_store.record_many(site, [
+            ({'hotel_url': hotel_url, 'checkin_date': stay[0], 'checkout_date': stay[1], **search}, result)
+            for stay, result in quoted
+        ])
+        results.update(scraped)
+
+    conversions = dict(zip(stays, convert_results([results[stay] for stay in stays], currency)))
+
+    dates = []
+    for stay in stays:
+        result = results[stay]
+        price, taxes = conversions[stay] or (result.get('price'), result.get('taxes', 0))
+        dates.append({
+            "check_in": stay[0],
+            "check_out": stay[1],
+            "price": price,
+            "taxes": taxes,
+            "total": round(price + (taxes or 0), 2) if price is not None else None,
+            "currency": currency if conversions[stay] else result.get('currency'),
+            "availability": result.get('availability', 'Not available'),
+            "cached": stay not in misses,
+            "error": result.get('error')
+        })
+
+    priced = [entry for entry in dates if entry['availability'] == 'Available' and entry['total']]
+    cheapest = None
+    # Same rule as /compare: only rank dates quoted in one currency
+    if priced and len({entry['currency'] for entry in priced}) == 1:
+        cheapest = min(priced, key=lambda entry: entry['total'])
+    return {
+        "success": True,
+        "site": site,
+        "hotel_name": next((result['hotel_name'] for result in results.values() if result.get('hotel_name')), None),
+        "nights": nights,
+        "dates": dates,
+        "cheapest": cheapest
+    }
+
+def _enqueue_scrape_job(site):
+    source = get_provider(site).label
+    data = request.get_json(silent=True)
+    if not data or 'hotelUrl' not in data:
+        logger.warning("Missing required field: hotelUrl")
         return _build_cors_response({
             "success": False,
-            "error": f"An unexpected error occurred: {str(e)}",
-            "fallback_data": get_fallback_data("Trip.com")
-        }, 500)
+            "error": "Missing required field: hotelUrl",
+            "fallback_data": get_fallback_data(source)
+        }, 400)
+
+    validation_error = validate_scrape_request(site, data)
+    if validation_error:
+        return _build_cors_response({
+            "success": False,
+            "error": validation_error,
+            "fallback_data": get_fallback_data(source)
+        }, 400)
+
+    try:
+        job = scrape_jobs.submit(source, _run_scrape_job, site, data)
+    except QueueFull as e:
+        return _queue_full_response(source, e)
+    return _build_cors_response({
+        "success": True,
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "poll_url": f"/jobs/{job['job_id']}",
+        "events_url": f"/jobs/{job['job_id']}/events",
+        "last_known": _last_known_quote(site, data)
+    }, 202)
+
+def _wants_stale_while_revalidate(data):
+    return request.args.get('swr') == '1' or bool(data.get('staleWhileRevalidate'))
+
+def _serve_stale_while_revalidate(site, data):
+    # Answers from the latest stored quote and refreshes it in the background.
+    # Returns None when nothing usable is stored or the stored quote is still fresh,
+    # in which case the normal path is cheap (cache hit) or unavoidable (first scrape).
+    source = get_provider(site).label
+    stored = _last_known_quote(site, data)
+    # Only a real price is worth serving stale; anything else goes through the normal path and its error payload
+    if stored is None or stored['availability'] != 'Available' or stored['price'] is None:
+        return None
+    age = time.time() - stored['scraped_at']
+    if age < quote_cache.ttl_for(stored):
+        return None
+
+    revalidation_key = (
+        source, stored['hotel_key'], stored['checkin_date'], stored['checkout_date'],
+        stored['adults'], stored['children'], stored['rooms'], data.get('currency', 'USD')
+    )
+    with revalidations_lock:
+        job_id = revalidations.get(revalidation_key)
+        job = scrape_jobs.get(job_id) if job_id else None
+        if job is None or job['status'] in FINISHED_STATES:
+            try:
+                job = scrape_jobs.submit(source, _run_scrape_job, site, data)
+                revalidations[revalidation_key] = job['job_id']
+            except QueueFull:
+                # Still worth answering from history; the next stale request will try the refresh again
+                job = None
+        for key in [key for key, other_id in revalidations.items() if scrape_jobs.get(other_id) is None]:
+            del revalidations[key]
+
+    payload, _ = build_scrape_payload(source, data, {key: value for key, value in stored.items() if value is not None})
+    payload.update({
+        "stale": True,
+        "age_seconds": round(age),
+        "scraped_at": datetime.utcfromtimestamp(stored['scraped_at']).isoformat() + "Z"
+    })
+    if job is None:
+        logger.info(f"Serving {source} quote from history ({age:.0f}s old), job queue full so not refreshing it")
+        return payload
+    logger.info(f"Serving {source} quote from history ({age:.0f}s old) while job {job['job_id']} refreshes it")
+    payload.update({
+        "job_id": job['job_id'],
+        "poll_url": f"/jobs/{job['job_id']}",
+        "events_url": f"/jobs/{job['job_id']}/events"
+    })
+    return payload
+
+def _last_known_quote(site, data):
+    # Lets the client show the most recent stored price while the fresh scrape runs
+    try:
+        return price_store.last_known(
+            site,
+            data['hotelUrl'],
+            data.get('checkIn', datetime.now().strftime('%Y-%m-%d')),
+            data.get('checkOut', (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')),
+            data.get('adults', 2),
+            data.get('children', 0),
+            data.get('rooms', 1)
+        )
+    except Exception as e:
+        logger.warning(f"Could not read last known {get_provider(site).label} price: {str(e)}")
+        return None
+
+def _run_scrape_job(site, data):
+    # Background scrapes (jobs, /compare, SWR refreshes) are admitted one by one, like direct requests
+    source = get_provider(site).label
+    try:
+        result = process_quote_request(site, data, admit=True)
+    except Overloaded as e:
+        return _shed_payload(source, str(e), e.retry_after)
+    payload, _ = build_scrape_payload(source, data, result)
+    return payload
+
+def _scrape_request_data():
+    # The GET form carries the POST body's fields in the query string
+    if request.method == 'GET':
+        return request.args.to_dict()
+    return request.get_json()
+
+def _canonical_query_redirect():
+    # GET quotes are cached by URL, so every spelling of a query is sent to the one canonical URL
+    if request.method != 'GET':
+        return None
+    canonical = canonical_query(request.args, SCRAPE_QUERY_FIELDS)
+    if request.query_string.decode() == canonical:
+        return None
+    response = redirect(f"{request.path}?{canonical}", 308)
+    origin = request.headers.get('Origin')
+    if origin in allowed_origins:
+        response.headers.add("Access-Control-Allow-Origin", origin)
+    response.headers['Cache-Control'] = f"public, max-age={CANONICAL_REDIRECT_MAX_AGE}"
+    return response
+
+def _build_quote_response(payload, status_code, result):
+    # Cacheable for whatever is left of the quote's cache TTL, and 304 when the client holds this version
+    response, status_code = _build_cors_response(payload, status_code)
+    response.status_code = status_code
+    age = time.time() - result['scraped_at'] if result.get('scraped_at') else 0
+    apply_cache_headers(response, request, payload, quote_cache.ttl_for(result), age)
+    return response, response.status_code
 
 def _build_cors_response(data, status_code=200):
     response = jsonify(data)
@@ -179,7 +761,108 @@ def get_fallback_data(source):
         "source": source
     }
 
-def process_booking_request(data):
+def _admit_scrape(site, hotel_url, deadline=None):
+    # Only scrapes that will go to the site get here: cache hits and joined flights are neither limited nor queued
+    identity = ("hotel", site, canonical_hotel_url(hotel_url))
+    # hit() checks and counts in one step, so concurrent misses for one hotel cannot all slip under the limit.
+    # A scrape that admission then sheds has still used its slot.
+    if limiter.enabled and not limiter.limiter.hit(hotel_rate_limit, *identity):
+        reset_at, _ = limiter.limiter.get_window_stats(hotel_rate_limit, *identity)
+        ADMISSION_REJECTIONS.inc(reason="hotel_rate_limited")
+        raise Overloaded(
+            f"Rate limit exceeded ({RATE_LIMIT_PER_HOTEL} for this hotel), please try again shortly",
+            max(1, int(reset_at - time.time())), 429
+        )
+    admission.admit(deadline)
+
+def _scrape_and_cache(cache_key, site, force_refresh=False, **scrape_kwargs):
+    # A request that just missed the previous flight may find its result cached
+    cached = None if force_refresh else quote_cache.get(cache_key, record=False)
+    if cached is not None:
+        return cached
+    result = scrape_hotel(site, **scrape_kwargs)
+    if 'availability' in result:
+        quote_cache.set(cache_key, result)
+        price_store.record(site, scrape_kwargs, result)
+    return result
+
+def quote_cache_key(site, hotel_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD', child_ages=''):
+    # The full normalized search URL: results-page links identify their hotel through the query string
+    search_url = get_provider(site).modify_hotel_url(
+        hotel_url, checkin_date, checkout_date, adults, children, rooms, currency, child_ages
+    )
+    return make_cache_key(site, search_url, currency)
+
+def convert_results(results, currency):
+    # (price, taxes) in the requested currency for every result in one FX batch, None where unsupported
+    currency = (currency or 'USD').upper()
+    convertible = [
+        i for i, result in enumerate(results)
+        if fx_table.supports(result.get('currency')) and fx_table.supports(currency)
+    ]
+    converted = fx_table.convert_many(
+        [results[i].get(field) for i in convertible for field in ('price', 'taxes')],
+        [results[i]['currency'] for i in convertible for _ in range(2)],
+        currency
+    ) if convertible else []
+    conversions = [None] * len(results)
+    for n, i in enumerate(convertible):
+        conversions[i] = tuple(converted[2 * n:2 * n + 2])
+    return conversions
+
+def scrape_currency_for(site, currency):
+    # Scrape in the site's own currency so one cached quote serves every display currency
+    if fx_table.supports(currency):
+        return get_provider(site).default_currency
+    return currency
+
+def convert_quote(result, currency):
+    # Returns price/taxes in the requested currency plus every supported currency from one FX batch
+    native_currency = (result.get('currency') or '').upper()
+    currency = (currency or 'USD').upper()
+    price, taxes = result.get('price'), result.get('taxes', 0)
+    if not fx_table.supports(native_currency) or not fx_table.supports(currency):
+        return price, taxes, result.get('currency'), None
+    matrix = fx_table.price_matrix([price, taxes or 0], native_currency)
+    prices = {code: {"price": values[0], "taxes": values[1]} for code, values in matrix.items()}
+    return prices[currency]['price'], prices[currency]['taxes'], currency, prices
+
+def build_scrape_payload(source, data, result):
+    if 'error' in result:
+        logger.error(f"{source} scraping error: {result['error']}")
+        return {
+            "success": False,
+            "error": result['error'],
+            "fallback_data": get_fallback_data(source),
+            "alternative_dates": result.get('alternative_dates', [])
+        }, 200
+
+    native_currency = result.get('currency', get_fallback_data(source)['currency'])
+    price, taxes, currency, prices = convert_quote({**result, 'currency': native_currency}, data.get('currency'))
+    return {
+        "success": True,
+        "scraped_at": datetime.utcfromtimestamp(result['scraped_at']).isoformat() + "Z" if result.get('scraped_at') else None,
+        "data": {
+            "hotel_name": result.get('hotel_name', 'Unknown Hotel'),
+            "price": price,
+            "taxes": taxes,
+            "currency": currency,
+            "native_price": result.get('price', None),
+            "native_taxes": result.get('taxes', 0),
+            "native_currency": native_currency,
+            "prices": prices,
+            "check_in": result.get('checkin_date', data.get('checkIn')),
+            "check_out": result.get('checkout_date', data.get('checkOut')),
+            "occupants": int(data.get('adults', 2)) + int(data.get('children', 0)),
+            "availability": result.get('availability', 'Not available'),
+            "room_type": result.get('room_type', 'Standard Room'),
+            "source": source,
+            "source_url": result.get('source_url', data['hotelUrl'])
+        }
+    }, 200
+
+def process_quote_request(site, data, force_refresh=False, admit=False):
+    provider = get_provider(site)
     try:
         checkin_date = data.get('checkIn', datetime.now().strftime('%Y-%m-%d'))
         checkout_date = data.get('checkOut', (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'))
@@ -187,64 +870,209 @@ def process_booking_request(data):
         children = int(data.get('children', 0))
         rooms = int(data.get('rooms', 1))
         hotel_url = data.get('hotelUrl')
-        child_ages = data.get('child_ages', '')  
+        child_ages = data.get('child_ages') or ''
+        currency = data.get('currency', 'USD')
+        deadline = data.get('deadlineSeconds')
 
-        logger.info(f"Processing Booking.com request: {checkin_date} → {checkout_date}, adults={adults}, children={children}")
+        logger.info(f"Processing {provider.label} request: {checkin_date} → {checkout_date}, adults={adults}, children={children}")
 
         if not hotel_url:
             return {"error": "Hotel URL is required"}
 
-        if not hotel_url.startswith('https://www.booking.com'):
-            return {"error": "Invalid Booking.com URL"}
+        if not hotel_url.startswith(provider.url_prefix):
+            return {"error": f"Invalid {provider.label} URL"}
 
-        result = scrape_booking_hotel(
+        scrape_currency = scrape_currency_for(site, currency)
+        cache_key = quote_cache_key(site, hotel_url, checkin_date, checkout_date, adults, children, rooms, scrape_currency, child_ages)
+        if not force_refresh:
+            prewarmer.record_request(site, data)
+            cached = quote_cache.get(cache_key)
+            CACHE_LOOKUPS.inc(site=site, result="miss" if cached is None else "hit")
+            if cached is not None:
+                logger.info(f"Serving {provider.label} quote from cache")
+                return cached
+        # Joining a scrape already in flight costs no browser, only new scrapes queue for one
+        if admit and not scrape_flight.in_flight(cache_key):
+            _admit_scrape(site, hotel_url, deadline)
+
+        return scrape_flight.do(
+            cache_key,
+            _scrape_and_cache,
+            cache_key,
+            site,
+            force_refresh=force_refresh,
             hotel_url=hotel_url,
             checkin_date=checkin_date,
             checkout_date=checkout_date,
             adults=adults,
             children=children,
             rooms=rooms,
-            child_ages=child_ages  
+            currency=scrape_currency,
+            child_ages=child_ages,
+            deadline=deadline
         )
-
-        return result
+    except Overloaded:
+        raise
     except Exception as e:
-        logger.error(f"Error processing Booking.com request: {str(e)}")
+        logger.error(f"Error processing {provider.label} request: {str(e)}")
         return {"error": str(e)}
 
-def process_trip_request(data):
+def process_destination_request(data, deadline=DESTINATION_DEADLINE_SECONDS):
+    site = data['site']
+    provider = get_provider(site)
+    list_url = data['listUrl']
+    if not list_url.startswith(provider.url_prefix):
+        return {"error": f"Invalid {provider.label} URL"}
+
+    search = {
+        'checkin_date': data.get('checkIn', datetime.now().strftime('%Y-%m-%d')),
+        'checkout_date': data.get('checkOut', (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')),
+        'adults': int(data.get('adults', 2)),
+        'children': int(data.get('children', 0)),
+        'rooms': int(data.get('rooms', 1)),
+        'currency': scrape_currency_for(site, data.get('currency', 'USD')),
+        'child_ages': data.get('child_ages') or ''
+    }
+    options = {
+        'pages': int(data.get('pages', 1)),
+        'scrolls': int(data.get('scrolls', 0)),
+        'max_hotels': int(data['maxHotels']) if data.get('maxHotels') else None
+    }
+    city = data.get('city') or listing_city(list_url)
+    logger.info(f"Processing {provider.label} destination request: {list_url}, {options}")
+    # Identical destination searches in flight share one browser session
+    flight_key = make_cache_key(f"{site}-listing-{options['pages']}-{options['scrolls']}-{options['max_hotels']}", provider.modify_hotel_url(
+        list_url, search['checkin_date'], search['checkout_date'], search['adults'], search['children'],
+        search['rooms'], search['currency'], search['child_ages']
+    ), search['currency'])
+    if not scrape_flight.in_flight(flight_key):
+        admission.admit(deadline)
+    return scrape_flight.do(flight_key, _scrape_listing_and_store, site, list_url, search, options, deadline, city)
+
+def _scrape_listing_and_store(site, list_url, search, options, deadline, city=None):
+    result = scrape_listing(site, list_url, **search, **options, deadline=deadline)
+    if 'error' in result:
+        return result
+    result['city'] = city
+    if city:
+        hotel_index.add(city, site, result['hotels'])
+    # Every card is a full quote for its property: seed the quote cache and price history in one batch each
+    quotes = [({**search, 'hotel_url': hotel['hotel_url']}, hotel) for hotel in result['hotels'] if 'availability' in hotel]
+    quote_cache.set_many([(quote_cache_key(site, hotel['hotel_url'], **search), hotel) for _, hotel in quotes])
+    price_store.record_many(site, quotes)
+    return result
+
+def refresh_quote(site, data):
+    # Admitted like a live cache miss, so pre-warming gives way when browsers or the hotel's rate limit are busy
     try:
-        checkin_date = data.get('checkIn', datetime.now().strftime('%Y-%m-%d'))
-        checkout_date = data.get('checkOut', (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'))
-        adults = int(data.get('adults', 2))
-        children = int(data.get('children', 0))
-        rooms = int(data.get('rooms', 1))
-        hotel_url = data.get('hotelUrl')
-        child_ages = data.get('child_ages', '')  
+        return process_quote_request(site, data, force_refresh=True, admit=True)
+    except Overloaded as e:
+        return {"error": str(e), "shed": True}
 
-        logger.info(f"Processing Trip.com request: {checkin_date} → {checkout_date}, adults={adults}, children={children}")
+def _browser_pool_busy():
+    stats = get_pool_stats()
+    return stats['queue_depth'] > 0 or stats['in_use'] >= stats['size']
 
-        if not hotel_url:
-            return {"error": "Hotel URL is required"}
+prewarmer = Prewarmer(refresh_quote, is_busy=_browser_pool_busy, scrape_currency=scrape_currency_for)
+if PREWARM_ENABLED:
+    prewarmer.start()
 
-        if not hotel_url.startswith('https://www.trip.com'):
-            return {"error": "Invalid Trip.com URL"}
+COMPARE_SPEC_FIELDS = ('checkIn', 'checkOut', 'adults', 'children', 'rooms', 'child_ages', 'currency')
 
-        result = scrape_trip_hotel(
-            hotel_url=hotel_url,
-            checkin_date=checkin_date,
-            checkout_date=checkout_date,
-            adults=adults,
-            children=children,
-            rooms=rooms,
-            child_ages=child_ages  
-        )
+COMPARE_SOURCES = (
+    ("booking", ("bookingUrl", "booking_dot_com_affiliate_url")),
+    ("trip", ("tripUrl", "trip_dot_com_affiliate_url")),
+)
 
-        return result
-    except Exception as e:
-        logger.error(f"Error processing Trip.com request: {str(e)}")
-        return {"error": str(e)}
+def _invalid_comparisons(hotels, spec):
+    # One {"index", "error"} per rejected hotel (plus "source" when one of its URLs is at fault)
+    invalid = []
+    for index, hotel in enumerate(hotels):
+        if not isinstance(hotel, dict):
+            invalid.append({"index": index, "error": "Each hotel must be an object"})
+            continue
+        urls = 0
+        for site, url_fields in COMPARE_SOURCES:
+            hotel_url = next((hotel[field] for field in url_fields if hotel.get(field)), None)
+            if not hotel_url:
+                continue
+            urls += 1
+            error = validate_scrape_request(site, {**spec, 'hotelUrl': hotel_url})
+            if error:
+                invalid.append({"index": index, "source": get_provider(site).label, "error": error})
+        if not urls:
+            invalid.append({"index": index, "error": "Hotel has neither a bookingUrl nor a tripUrl"})
+    return invalid
+
+def _submit_comparisons(hotels, spec):
+    # Every scrape of the request goes on the compare executor in one batch, or none does (QueueFull)
+    comparisons = {}
+    pending = {}
+    calls = []
+    for index, hotel in enumerate(hotels):
+        comparisons[index] = {
+            "index": index,
+            "id": hotel.get('id'),
+            "name": hotel.get('name'),
+            "quotes": {}
+        }
+        pending[index] = 0
+        for site, url_fields in COMPARE_SOURCES:
+            hotel_url = next((hotel[field] for field in url_fields if hotel.get(field)), None)
+            if not hotel_url:
+                continue
+            data = {**spec, 'hotelUrl': hotel_url}
+            calls.append(((index, get_provider(site).label), (_run_scrape_job, (site, data), {})))
+            pending[index] += 1
+    futures = dict(zip(compare_executor.submit_many([call for _, call in calls]), [target for target, _ in calls]))
+    return comparisons, pending, futures
+
+def _iter_comparisons(comparisons, pending, futures):
+    # Yields one merged comparison per hotel as soon as all of its sources have answered
+
+    for index, count in pending.items():
+        if count == 0:
+            yield _finish_comparison(comparisons[index])
+
+    for future in as_completed(futures):
+        index, source = futures[future]
+        try:
+            payload = future.result()
+        except Exception as e:
+            logger.error(f"Unexpected {source} compare error: {str(e)}")
+            payload = {
+                "success": False,
+                "error": f"An unexpected error occurred: {str(e)}",
+                "fallback_data": get_fallback_data(source)
+            }
+        comparisons[index]['quotes'][source] = payload
+        pending[index] -= 1
+        if pending[index] == 0:
+            yield _finish_comparison(comparisons[index])
+
+def _finish_comparison(comparison):
+    offers = [
+        (quote['data']['price'] + (quote['data']['taxes'] or 0), source, quote['data']['currency'])
+        for source, quote in comparison['quotes'].items()
+        if quote.get('success') and quote['data']['availability'] == 'Available' and quote['data']['price']
+    ]
+    comparison['cheapest'] = None
+    # Flags pairs whose URLs point the two sites at different properties
+    names = [
+        quote['data']['hotel_name'] for quote in comparison['quotes'].values()
+        if quote.get('success') and quote['data']['hotel_name'] != 'Unknown Hotel'
+    ]
+    if len(names) == 2:
+        score = name_similarity(*names)
+        comparison['same_property'] = {"score": round(score, 1), "match": score >= hotel_index.threshold}
+    # Only rank offers quoted in the same currency
+    if offers and len({currency for _, _, currency in offers}) == 1:
+        total, source, currency = min(offers)
+        comparison['cheapest'] = {"source": source, "total": total, "currency": currency}
+    return comparison
 
 if __name__ == '__main__':
+    # Under gunicorn this starts from the post_worker_init hook in gunicorn.conf.py
+    fx_table.start_background_refresh()
     port = int(os.getenv("PORT", 5000))
     app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,36 @@
+from threading import Thread
+import logging
+import os
+
+# gunicorn picks this file up automatically when started from backend/, e.g. `gunicorn app:app`.
+# Command-line flags (-w, --threads, -b, --timeout) still take precedence over anything here.
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Browsers to launch in each worker right after it forks; 0 leaves the pool to fill on first use
+PREWARM_BROWSERS = int(os.getenv("SCRAPER_PREWARM_BROWSERS", 0))
+
+
+def _prewarm_browsers():
+    try:
+        from scripts.scraping_engine import prewarm_browsers
+        prewarm_browsers(PREWARM_BROWSERS)
+    except Exception as e:
+        logger.error(f"Browser pre-warm failed: {str(e)}")
+
+
+def post_fork(server, worker):
+    # Chrome is launched per worker, never in the master, so no browser or pool lock crosses a fork.
+    # The launch runs in the background so the worker starts accepting requests straight away.
+    if PREWARM_BROWSERS > 0:
+        Thread(target=_prewarm_browsers, name="browser-prewarm", daemon=True).start()
+
+
+def post_worker_init(worker):
+    # The app is loaded by now; its FX rates are fetched in the background rather than while importing it
+    try:
+        from app import fx_table
+        fx_table.start_background_refresh()
+    except Exception as e:
+        logger.error(f"FX rate refresh could not be started: {str(e)}")
@@ -0,0 +1,125 @@
+from threading import Lock
+import logging
+import math
+import os
+
+from scripts.metrics import ADMISSION_REJECTIONS
+from scripts.scraping_engine import MAX_LISTING_HOTELS, MAX_LISTING_PAGES, MAX_LISTING_SCROLLS, get_provider, validate_dates
+from scripts.site_health import resolve_deadline
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Requests already waiting for a browser beyond which new scrapes are turned away outright
+MAX_QUEUE_DEPTH = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", 16))
+# Assumed browser hold time until the pool has measured its own
+DEFAULT_SCRAPE_SECONDS = float(os.getenv("ADMISSION_DEFAULT_SCRAPE_SECONDS", 10))
+MAX_GUESTS = 30
+MAX_CHILDREN = 10
+
+
+class Overloaded(Exception):
+    def __init__(self, message, retry_after, status_code=503):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+def validate_scrape_request(site, data):
+    # Everything that can be rejected without a browser, checked before the request takes a place in line
+    provider = get_provider(site)
+    hotel_url = data.get('hotelUrl')
+    if not hotel_url:
+        return "Hotel URL is required"
+    if not hotel_url.startswith(provider.url_prefix):
+        return f"Invalid {provider.label} URL"
+    return _validate_search(data)
+
+
+def validate_destination_request(site, data):
+    # As validate_scrape_request, plus the crawl size: one request must not hold a browser for an unbounded crawl
+    provider = get_provider(site)
+    list_url = data.get('listUrl')
+    if not list_url:
+        return "Results page URL is required"
+    if not list_url.startswith(provider.url_prefix):
+        return f"Invalid {provider.label} URL"
+    try:
+        pages = int(data.get('pages', 1))
+        scrolls = int(data.get('scrolls', 0))
+        max_hotels = int(data['maxHotels']) if data.get('maxHotels') else None
+    except (TypeError, ValueError):
+        return "pages, scrolls and maxHotels must be numbers"
+    if not 1 <= pages <= MAX_LISTING_PAGES or not 0 <= scrolls <= MAX_LISTING_SCROLLS:
+        return f"Expected 1-{MAX_LISTING_PAGES} pages and 0-{MAX_LISTING_SCROLLS} scrolls"
+    if max_hotels is not None and not 1 <= max_hotels <= MAX_LISTING_HOTELS:
+        return f"maxHotels must be between 1 and {MAX_LISTING_HOTELS}"
+    return _validate_search(data)
+
+
+def _validate_search(data):
+    if data.get('checkIn') or data.get('checkOut'):
+        if not (data.get('checkIn') and data.get('checkOut')):
+            return "Both checkIn and checkOut are required"
+        date_error = validate_dates(data['checkIn'], data['checkOut'])
+        if date_error:
+            return date_error
+    try:
+        adults = int(data.get('adults', 2))
+        children = int(data.get('children', 0))
+        rooms = int(data.get('rooms', 1))
+        if data.get('deadlineSeconds') is not None:
+            float(data['deadlineSeconds'])
+    except (TypeError, ValueError):
+        return "adults, children, rooms and deadlineSeconds must be numbers"
+    if not 1 <= adults <= MAX_GUESTS or not 1 <= rooms <= MAX_GUESTS or not 0 <= children <= MAX_CHILDREN:
+        return f"Expected 1-{MAX_GUESTS} adults and rooms and 0-{MAX_CHILDREN} children"
+    if rooms > adults:
+        return "Each room needs at least one adult"
+    return None
+
+
+class AdmissionController:
+    def __init__(self, pool_stats, max_queue_depth=MAX_QUEUE_DEPTH, default_scrape_seconds=DEFAULT_SCRAPE_SECONDS):
+        self.pool_stats = pool_stats
+        self.max_queue_depth = max(1, int(max_queue_depth))
+        self.default_scrape_seconds = default_scrape_seconds
+        self._lock = Lock()
+        self._stats = {"admitted": 0, "shed_queue_full": 0, "shed_deadline": 0}
+
+    def estimate(self, stats=None):
+        # Seconds until a new request gets a browser, and how long it will then hold it
+        stats = stats or self.pool_stats()
+        hold = stats.get("avg_hold_seconds") or self.default_scrape_seconds
+        ahead = stats["queue_depth"] + 1 - (stats["size"] - stats["in_use"])
+        return max(0.0, ahead / stats["size"] * hold), hold
+
+    def admit(self, deadline=None):
+        stats = self.pool_stats()
+        wait, hold = self.estimate(stats)
+        retry_after = max(1, math.ceil(wait))
+        if stats["queue_depth"] >= self.max_queue_depth:
+            self._reject("shed_queue_full", "queue_full")
+            raise Overloaded(f"{stats['queue_depth']} requests are already waiting for a scraper", retry_after)
+        # The deadline covers waiting and scraping, a request that cannot finish in time is refused now
+        deadline = resolve_deadline(deadline)
+        if wait + hold > deadline:
+            self._reject("shed_deadline", "deadline")
+            raise Overloaded(f"Estimated wait of {wait:.0f}s would exceed the {deadline:g}s deadline", retry_after)
+        with self._lock:
+            self._stats["admitted"] += 1
+
+    def _reject(self, stat, reason):
+        with self._lock:
+            self._stats[stat] += 1
+        ADMISSION_REJECTIONS.inc(reason=reason)
+
+    def stats(self):
+        wait, hold = self.estimate()
+        with self._lock:
+            return {
+                **self._stats,
+                "max_queue_depth": self.max_queue_depth,
+                "estimated_wait_seconds": round(wait, 2),
+                "estimated_scrape_seconds": round(hold, 2),
+            }
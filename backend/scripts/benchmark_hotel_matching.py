@@ -0,0 +1,114 @@
+import argparse
+import random
+import string
+import time
+
+from fuzzywuzzy import fuzz as legacy_fuzz
+
+from scripts.hotel_matching import HotelMatchIndex
+
+# Usage (from backend/):
+#   python -m scripts.benchmark_hotel_matching                  # 2,000 listings per site
+#   python -m scripts.benchmark_hotel_matching --hotels 5000 --batches 10
+#   python -m scripts.benchmark_hotel_matching --pairwise 300   # also time the fuzzywuzzy pairwise loop
+
+BRANDS = ["Protea", "Radisson Blu", "Southern Sun", "City Lodge", "Tsogo Sun", "Holiday Inn", "Premier", "Hilton", "Marriott", "Ibis"]
+WORDS = ["Ocean", "Harbour", "Garden", "Mountain", "Lagoon", "Palm", "Sunset", "Coral", "Bay", "Park", "River", "View",
+         "Grand", "Royal", "Beach", "Point", "Manor", "Lodge", "Villa", "House", "Towers", "Court", "Boutique", "Sands"]
+SUFFIXES = ["Hotel", "Resort & Spa", "Suites", "Guest House", "Apartments", ""]
+STREETS = ["Marine Parade", "Florida Road", "Lighthouse Road", "Chartwell Drive", "Sandile Thusi Road", "Beach Road"]
+
+
+def make_hotel(rng, i):
+    name = f"{rng.choice(BRANDS) + ' ' if rng.random() < 0.4 else ''}{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(SUFFIXES)}".strip()
+    return {"name": name, "address": f"{rng.randint(1, 400)} {rng.choice(STREETS)}, Durban", "id": i}
+
+
+def perturb(rng, name):
+    # How the same property tends to differ between the two sites
+    choice = rng.random()
+    if choice < 0.2:
+        name = f"The {name}"
+    elif choice < 0.4:
+        name = name.replace("&", "and")
+    elif choice < 0.55:
+        name = f"{name} by {rng.choice(BRANDS)}"
+    elif choice < 0.7:
+        name = name.upper()
+    elif choice < 0.85 and len(name) > 6:
+        i = rng.randrange(len(name))
+        name = name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+    return name
+
+
+def build_sites(rng, hotels, overlap):
+    properties, names = [], set()
+    while len(properties) < hotels:
+        hotel = make_hotel(rng, len(properties))
+        # Distinct properties only; two real hotels with one name cannot be told apart by name either
+        if hotel["name"] not in names:
+            names.add(hotel["name"])
+            properties.append(hotel)
+    booking = [
+        {"hotel_name": p["name"], "location": p["address"], "source_url": f"https://www.booking.com/hotel/za/p{p['id']}.html"}
+        for p in properties
+    ]
+    shared = rng.sample(properties, int(hotels * overlap))
+    trip = [
+        {"hotel_name": perturb(rng, p["name"]), "location": p["address"] if rng.random() < 0.7 else None,
+         "source_url": f"https://www.trip.com/hotels/detail/?hotelId={p['id']}"}
+        for p in shared
+    ]
+    trip += [
+        {"hotel_name": make_hotel(rng, -1)["name"], "location": None, "source_url": f"https://www.trip.com/hotels/detail/?hotelId=x{i}"}
+        for i in range(hotels - len(shared))
+    ]
+    rng.shuffle(trip)
+    return booking, trip
+
+
+def truth(pair):
+    booking_id = pair["booking"]["hotel_url"].rsplit("/p", 1)[1].split(".")[0]
+    return pair["trip"]["hotel_url"].endswith(f"hotelId={booking_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time incremental cdist matching against a pairwise fuzzywuzzy loop")
+    parser.add_argument("--hotels", type=int, default=2000, help="Listings per site")
+    parser.add_argument("--overlap", type=float, default=0.7, help="Share of properties listed on both sites")
+    parser.add_argument("--batches", type=int, default=5, help="Refreshes the Trip.com listings arrive in")
+    parser.add_argument("--pairwise", type=int, default=200, help="Listings per site for the pairwise baseline (0 to skip)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    booking, trip = build_sites(rng, args.hotels, args.overlap)
+
+    index = HotelMatchIndex()
+    started = time.perf_counter()
+    index.add("Durban", "booking", booking)
+    size = -(-len(trip) // args.batches)
+    for start in range(0, len(trip), size):
+        batch_started = time.perf_counter()
+        index.add("Durban", "trip", trip[start:start + size])
+        print(f"batch of {len(trip[start:start + size])} Trip.com listings scored in {time.perf_counter() - batch_started:.3f}s")
+    build = time.perf_counter() - started
+    pairs = index.pairs("Durban")
+    correct = sum(1 for pair in pairs if truth(pair))
+    expected = int(args.hotels * args.overlap)
+    print(f"cdist index: {args.hotels}x{len(trip)} pairs in {build:.3f}s, {len(pairs)} matches, "
+          f"precision {correct / len(pairs) if pairs else 0:.3f}, recall {correct / expected:.3f}")
+
+    if args.pairwise:
+        sample_booking, sample_trip = booking[:args.pairwise], trip[:args.pairwise]
+        started = time.perf_counter()
+        for b in sample_booking:
+            max(sample_trip, key=lambda t: legacy_fuzz.ratio(b["hotel_name"], t["hotel_name"]))
+        elapsed = time.perf_counter() - started
+        per_pair = elapsed / (len(sample_booking) * len(sample_trip))
+        print(f"pairwise fuzzywuzzy: {args.pairwise}x{args.pairwise} in {elapsed:.3f}s, "
+              f"~{per_pair * args.hotels * len(trip):.1f}s projected for {args.hotels}x{len(trip)}")
+
+
+if __name__ == "__main__":
+    main()
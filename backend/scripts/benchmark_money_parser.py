@@ -0,0 +1,103 @@
+import argparse
+import re
+import sys
+import timeit
+
+from scripts.money import parse_money
+
+# Usage (from backend/):
+#   python -m scripts.benchmark_money_parser --number 20000
+
+# (price element text, expected amount, expected currency or None when the text carries no marker)
+FIXTURES = [
+    ("US$1,234.56", 1234.56, "USD"),
+    ("US$ 89", 89.0, "USD"),
+    ("$412", 412.0, "USD"),
+    ("R 1 250", 1250.0, "ZAR"),
+    ("R1,250", 1250.0, "ZAR"),
+    ("ZAR 12 345,50", 12345.5, "ZAR"),
+    ("ZAR\u00a01\u00a0999", 1999.0, "ZAR"),
+    ("€ 1.234,56", 1234.56, "EUR"),
+    ("1.234,56 €", 1234.56, "EUR"),
+    ("€89,90", 89.9, "EUR"),
+    ("£1,020", 1020.0, "GBP"),
+    ("GBP 75.5", 75.5, "GBP"),
+    ("A$310", 310.0, "AUD"),
+    ("AU$ 1,005.25", 1005.25, "AUD"),
+    ("฿3,200", 3200.0, "THB"),
+    ("THB 12,750", 12750.0, "THB"),
+    ("Price for 2 nights: R 2 400", 2400.0, "ZAR"),
+    ("Rooms from US$120", 120.0, "USD"),
+    ("Total (incl. taxes & fees): US$1,421.40", 1421.4, "USD"),
+    ("1234", 1234.0, None),
+    ("1'234.50", 1234.5, None),
+    ("", None, None),
+    ("Sold out", None, None),
+]
+
+
+def legacy_extract_price(price_text):
+    if not price_text:
+        return None
+    price_text = price_text.replace("US$", "").replace("R", "").replace("ZAR", "").replace("£", "").replace("€", "").replace("A$", "").replace("฿", "").strip()
+    numbers = re.findall(r'[\d,]+(?:\.\d+)?', price_text.replace(",", ""))
+    return float(numbers[0]) if numbers else None
+
+
+def legacy_detect_currency(page_text, requested_currency):
+    if requested_currency.upper() in page_text.upper():
+        return requested_currency.upper()
+    if "ZAR" in page_text or "R" in page_text:
+        return "ZAR"
+    elif "$" in page_text or "US$" in page_text:
+        return "USD"
+    elif "£" in page_text:
+        return "GBP"
+    elif "€" in page_text:
+        return "EUR"
+    elif "A$" in page_text:
+        return "AUD"
+    elif "฿" in page_text:
+        return "THB"
+    return requested_currency.upper()
+
+
+def check(label, parse):
+    failures = []
+    for text, amount, currency in FIXTURES:
+        got = parse(text)
+        if got != (amount, currency):
+            failures.append((text, (amount, currency), got))
+    print(f"{label:<8} {len(FIXTURES) - len(failures)}/{len(FIXTURES)} fixtures correct")
+    for text, expected, got in failures:
+        print(f"         {text!r}: expected {expected}, got {got}")
+    return failures
+
+
+def bench(label, parse, number):
+    texts = [text for text, _, _ in FIXTURES]
+    seconds = timeit.timeit(lambda: [parse(text) for text in texts], number=number)
+    per_call = seconds / (number * len(texts)) * 1e6
+    print(f"{label:<8} {per_call:6.2f} µs per price element")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the money parser against the fixture table")
+    parser.add_argument("--number", type=int, default=20000, help="Passes over the fixture table per timing")
+    args = parser.parse_args()
+
+    # "GBP" is a neutral requested currency for the legacy detector, which echoes it back when present
+    legacy = lambda text: (legacy_extract_price(text), legacy_detect_currency(text, "GBP") if text else None)
+    current = lambda text: parse_money(text)
+
+    check("legacy", legacy)
+    failures = check("parser", current)
+    bench("legacy", legacy, args.number)
+    bench("parser", current, args.number)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
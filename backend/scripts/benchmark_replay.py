@@ -0,0 +1,103 @@
+import argparse
+import statistics
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from bs4 import BeautifulSoup
+
+from scripts import http_fetch
+from scripts import scrape_booking_dot_com_hotels as booking
+from scripts import scrape_trip_dot_com_hotels as trip
+from scripts.money import parse_money
+from scripts.page_extraction import extract_from_soup
+from scripts.replay import ReplayServer, check_result, fixture_html, load_manifest
+
+# Usage (from backend/):
+#   python -m scripts.benchmark_replay                 # parse + HTTP replay, no network needed
+#   python -m scripts.benchmark_replay --browser       # replay through Chrome instead of the HTTP fast path
+#   python -m scripts.benchmark_replay --only trip-available --repeat 10
+
+SITES = {
+    "booking": (booking.provider, booking.scrape_booking_hotel),
+    "trip": (trip.provider, trip.scrape_trip_hotel),
+}
+
+
+def timed(fn, repeat, number):
+    runs = [seconds / number for seconds in timeit.Timer(fn).repeat(repeat=repeat, number=number)]
+    return min(runs), statistics.median(runs), statistics.mean(runs)
+
+
+def report(name, stage, timings):
+    best, median, mean = (value * 1000 for value in timings)
+    print(f"{name:<22} {stage:<12} min {best:8.3f} ms  median {median:8.3f} ms  mean {mean:8.3f} ms")
+
+
+def run_fixture(entry, server, args, checkin, checkout):
+    provider, scrape_fn = SITES[entry["site"]]
+    html = fixture_html(entry)
+    url = server.url_for(entry)
+    failures = []
+
+    parsed = provider.parse_html(html, url, checkin, checkout, entry["currency"])
+    if parsed is not None:
+        failures += [f"parse {mismatch}" for mismatch in check_result(entry, parsed)]
+
+    def soup_only():
+        return BeautifulSoup(html, "html.parser")
+
+    soup = soup_only()
+    extracted = extract_from_soup(soup, provider.page_roots, url)
+    price_text = (extracted.get("card") or {}).get("price")
+
+    report(entry["name"], "soup", timed(soup_only, args.repeat, args.number))
+    report(entry["name"], "extraction", timed(lambda: extract_from_soup(soup, provider.page_roots, url), args.repeat, args.number))
+    report(entry["name"], "parse", timed(lambda: provider.parse_html(html, url, checkin, checkout, entry["currency"]), args.repeat, args.number))
+    if price_text:
+        report(entry["name"], "currency", timed(lambda: parse_money(price_text), args.repeat, args.number * 100))
+
+    def replay():
+        return scrape_fn(url, checkin, checkout, currency=entry["currency"])
+
+    result = replay()
+    failures += [f"replay {mismatch}" for mismatch in check_result(entry, result)]
+    # Page-load-to-result through the same code path the API uses, against the local stand-in
+    report(entry["name"], "replay", timed(replay, args.repeat, args.replay_number))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay saved HTML fixtures through the scrapers and time each stage")
+    parser.add_argument("--only", help="Run a single fixture by name")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20, help="Calls per timing for in-process stages")
+    parser.add_argument("--replay-number", type=int, default=5, help="Calls per timing for the end-to-end replay")
+    parser.add_argument("--browser", action="store_true", help="Load fixtures in Chrome instead of the HTTP fast path")
+    args = parser.parse_args()
+
+    if args.browser:
+        http_fetch.FAST_PATH_ENABLED = False
+        args.replay_number = 1
+
+    manifest = [entry for entry in load_manifest() if not args.only or entry["name"] == args.only]
+    checkin = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+    checkout = (datetime.now() + timedelta(days=15)).strftime('%Y-%m-%d')
+
+    failures = {}
+    with ReplayServer() as server:
+        for entry in manifest:
+            problems = run_fixture(entry, server, args, checkin, checkout)
+            if problems:
+                failures[entry["name"]] = problems
+
+    print(f"{len(manifest) - len(failures)}/{len(manifest)} fixtures matched their expected results")
+    for name, problems in failures.items():
+        for problem in problems:
+            print(f"  {name}: {problem}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from scripts import scrape_booking_dot_com_hotels as booking
+from scripts import scrape_trip_dot_com_hotels as trip
+from scripts.scraping_engine import setup_driver
+
+# Usage (from backend/):
+#   python -m scripts.benchmark_resource_blocking --site booking --url "https://www.booking.com/searchresults.html?ss=Cape+Town" --runs 3
+
+SITES = {
+    "booking": (booking, booking.PROPERTY_CARD_SELECTOR),
+    "trip": (trip, trip.HOTEL_CARD_SELECTOR),
+}
+
+
+def network_transfer(driver):
+    # Bytes on the wire from CDP Network.loadingFinished. The Resource Timing transferSize reads 0 for
+    # cross-origin responses without Timing-Allow-Origin, which is most of the CDN and tracker traffic.
+    transferred = requests = blocked = 0
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message['method'] == 'Network.loadingFinished':
+            transferred += message['params'].get('encodedDataLength', 0)
+            requests += 1
+        elif message['method'] == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            blocked += 1
+    return transferred, requests, blocked
+
+
+def measure(selector, url, block_resources, runs, timeout):
+    samples = []
+    driver = setup_driver(block_resources=block_resources, performance_log=True)
+    try:
+        for _ in range(runs):
+            driver.delete_all_cookies()
+            # Reading the log drains it, so each run only counts its own requests
+            driver.get_log('performance')
+            started = time.perf_counter()
+            driver.get(url)
+            WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+            time_to_selector = time.perf_counter() - started
+            samples.append((time_to_selector, *network_transfer(driver)))
+    finally:
+        driver.quit()
+    return samples
+
+
+def summarize(label, samples):
+    times = [sample[0] for sample in samples]
+    kilobytes = [sample[1] / 1024 for sample in samples]
+    requests = [sample[2] for sample in samples]
+    blocked = [sample[3] for sample in samples]
+    print(
+        f"{label:<10} time-to-selector median {statistics.median(times):6.2f}s  "
+        f"transferred median {statistics.median(kilobytes):9.1f} KiB  "
+        f"requests median {statistics.median(requests):5.0f}  "
+        f"blocked median {statistics.median(blocked):5.0f}"
+    )
+    return statistics.median(times), statistics.median(kilobytes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page weight and time-to-selector with and without resource blocking")
+    parser.add_argument("--site", choices=sorted(SITES), required=True)
+    parser.add_argument("--url", required=True, help="Hotel search URL as stored in the accommodations table")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    module, selector = SITES[args.site]
+    checkin = datetime.now() + timedelta(days=14)
+    url = module.modify_hotel_url(
+        args.url, checkin.strftime('%Y-%m-%d'), (checkin + timedelta(days=1)).strftime('%Y-%m-%d')
+    )
+
+    baseline = summarize("unblocked", measure(selector, url, False, args.runs, args.timeout))
+    blocked = summarize("blocked", measure(selector, url, True, args.runs, args.timeout))
+
+    if baseline[0] and baseline[1]:
+        print(
+            f"time-to-selector {100 * (1 - blocked[0] / baseline[0]):.0f}% faster, "
+            f"bytes {100 * (1 - blocked[1] / baseline[1]):.0f}% fewer"
+        )
+
+
+if __name__ == "__main__":
+    main()
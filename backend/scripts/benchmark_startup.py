@@ -0,0 +1,108 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Usage (from backend/):
+#   python -m scripts.benchmark_startup                      # app import + gunicorn boot, no browser needed
+#   python -m scripts.benchmark_startup --browser            # + ChromeDriver resolution and first Chrome launch
+#   CHROMEDRIVER_PATH=/usr/bin/chromedriver python -m scripts.benchmark_startup --browser
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("selenium", "webdriver_manager", "bs4", "httpx", "numpy", "supabase", "rapidfuzz", "brotli")
+BASE_ENV = {"PRICE_HISTORY": "0", "PREWARM_ENABLED": "0"}
+
+IMPORT_PROBE = f"""
+import sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(f"{{elapsed:.6f}} {{','.join(loaded)}}")
+"""
+
+BROWSER_PROBE = """
+import time
+from scripts import scraping_engine
+started = time.perf_counter()
+scraping_engine.resolve_chromedriver()
+resolved = time.perf_counter() - started
+scraping_engine.prewarm_browsers(1)
+print(f"{resolved:.6f} {time.perf_counter() - started - resolved:.6f}")
+scraping_engine.cleanup_driver()
+"""
+
+
+def run_probe(code, env):
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env={**os.environ, **BASE_ENV, **env},
+        capture_output=True, text=True, check=True
+    ).stdout
+    return output.strip().splitlines()[-1].split(" ")
+
+
+def time_import(repeat):
+    runs = []
+    loaded = ""
+    for _ in range(repeat):
+        seconds, loaded = (run_probe(IMPORT_PROBE, {}) + [""])[:2]
+        runs.append(float(seconds))
+    return runs, loaded
+
+
+def time_gunicorn_boot(repeat, port, prewarm):
+    # Process start to the first 200 from a freshly booted worker
+    runs = []
+    for _ in range(repeat):
+        env = {**os.environ, **BASE_ENV, "SCRAPER_PREWARM_BROWSERS": str(prewarm)}
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-w", "1", "-b", f"127.0.0.1:{port}", "--log-level", "warning", "app:app"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                try:
+                    httpx.get(f"http://127.0.0.1:{port}/", timeout=1).raise_for_status()
+                    break
+                except httpx.HTTPError:
+                    if process.poll() is not None or time.perf_counter() - started > 60:
+                        raise RuntimeError("gunicorn did not come up")
+                    time.sleep(0.01)
+            runs.append(time.perf_counter() - started)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return runs
+
+
+def report(label, runs):
+    print(f"{label:<34} min {min(runs):7.3f} s  median {statistics.median(runs):7.3f} s  max {max(runs):7.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time backend cold start: app import, worker boot and first browser")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5066)
+    parser.add_argument("--browser", action="store_true", help="Also time ChromeDriver resolution and one Chrome launch")
+    args = parser.parse_args()
+
+    runs, loaded = time_import(args.repeat)
+    report("import app", runs)
+    print(f"{'':<34} heavy modules loaded by import: {loaded or 'none'}")
+    report("gunicorn boot to first response", time_gunicorn_boot(args.repeat, args.port, prewarm=0))
+
+    if args.browser:
+        pinned = os.getenv("CHROMEDRIVER_PATH")
+        resolved, launched = zip(*(map(float, run_probe(BROWSER_PROBE, {})) for _ in range(args.repeat)))
+        report(f"chromedriver resolve ({'pinned' if pinned else 'webdriver_manager'})", resolved)
+        report("first Chrome launch", launched)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from queue import Queue, Full
+from threading import Lock, Thread
+import gzip
+import logging
+import os
+import random
+import time
+import uuid
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CAPTURE_ENABLED = os.getenv("DEBUG_CAPTURE", "0") == "1"
+CAPTURE_DIR = os.getenv("DEBUG_CAPTURE_DIR", "debug_captures")
+SUCCESS_SAMPLE_RATE = float(os.getenv("DEBUG_CAPTURE_SUCCESS_RATE", 0.02))
+ERROR_SAMPLE_RATE = float(os.getenv("DEBUG_CAPTURE_ERROR_RATE", 1.0))
+MAX_FILES = int(os.getenv("DEBUG_CAPTURE_MAX_FILES", 50))
+QUEUE_SIZE = 8
+
+_queue = Queue(maxsize=QUEUE_SIZE)
+_writer = None
+_writer_lock = Lock()
+_stats = {"captured": 0, "written": 0, "dropped": 0, "write_errors": 0}
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            os.makedirs(CAPTURE_DIR, exist_ok=True)
+            _writer = Thread(target=_write_loop, name="debug-capture", daemon=True)
+            _writer.start()
+
+
+def _write_loop():
+    while True:
+        filename, html = _queue.get()
+        try:
+            with gzip.open(os.path.join(CAPTURE_DIR, filename), 'wt', encoding='utf-8', compresslevel=5) as f:
+                f.write(html)
+            _stats["written"] += 1
+            _prune()
+        except OSError as e:
+            _stats["write_errors"] += 1
+            logger.warning(f"Failed to write debug capture {filename}: {str(e)}")
+        finally:
+            _queue.task_done()
+
+
+def _prune():
+    captures = sorted(
+        (entry for entry in os.scandir(CAPTURE_DIR) if entry.name.endswith(".html.gz")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in captures[:max(0, len(captures) - MAX_FILES)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def should_capture(is_error):
+    if not CAPTURE_ENABLED:
+        return False
+    return random.random() < (ERROR_SAMPLE_RATE if is_error else SUCCESS_SAMPLE_RATE)
+
+
+def capture_page(driver, site, kind, is_error=False):
+    # Sampling is decided before touching page_source so unsampled requests pay nothing
+    if not should_capture(is_error):
+        return None
+    try:
+        html = driver.page_source
+    except Exception as e:
+        logger.warning(f"Could not read page source for debug capture: {str(e)}")
+        return None
+    return capture_html(html, site, kind)
+
+
+def capture_html(html, site, kind):
+    _ensure_writer()
+    filename = f"{site}-{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.html.gz"
+    try:
+        _queue.put_nowait((filename, html))
+    except Full:
+        _stats["dropped"] += 1
+        return None
+    _stats["captured"] += 1
+    return filename
+
+
+def get_capture_stats():
+    return {"enabled": CAPTURE_ENABLED, "directory": CAPTURE_DIR, "pending": _queue.qsize(), **_stats}
@@ -0,0 +1,217 @@
+from contextlib import contextmanager
+from threading import Condition
+import logging
+import os
+import time
+from scripts.metrics import observe_stage, stage_timer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.getenv("SCRAPER_POOL_SIZE", 2))
+DEFAULT_MAX_PAGES = int(os.getenv("SCRAPER_MAX_PAGES_PER_DRIVER", 50))
+DEFAULT_CHECKOUT_TIMEOUT = float(os.getenv("SCRAPER_CHECKOUT_TIMEOUT", 90))
+# Weight of the newest sample in the moving average of how long a checkout holds a browser
+HOLD_EWMA_ALPHA = 0.2
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+        self.checked_out_at = None
+
+
+class DriverPool:
+    def __init__(self, factory, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES,
+                 checkout_timeout=DEFAULT_CHECKOUT_TIMEOUT, name="driver"):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.max_pages = max(1, int(max_pages))
+        self.checkout_timeout = checkout_timeout
+        self.name = name
+
+        self._cond = Condition()
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._health_failures = 0
+        self._launch_failures = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._hold_ewma = None
+
+    @contextmanager
+    def driver(self, timeout=None):
+        pooled = self._checkout(self.checkout_timeout if timeout is None else timeout)
+        try:
+            yield pooled.driver
+        finally:
+            self._checkin(pooled)
+
+    def _checkout(self, timeout):
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError(f"{self.name} pool is closed")
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        launch = False
+                        break
+                    if self._created < self.size:
+                        # Reserve the slot now, launch Chrome outside the lock
+                        self._created += 1
+                        pooled = None
+                        launch = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout:g}s waiting for a {self.name} browser"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+        # Queue time only, taken when the slot is ours; a Chrome launch for a fresh slot is timed separately as driver_launch
+        waited = time.monotonic() - started
+        observe_stage("pool_wait", self.name, waited)
+
+        try:
+            if not launch and not self._is_healthy(pooled):
+                logger.warning(f"[{self.name}] Pooled WebDriver failed health check, replacing it")
+                self._quit(pooled)
+                with self._cond:
+                    self._health_failures += 1
+                launch = True
+            if launch:
+                with stage_timer("driver_launch", self.name):
+                    pooled = _PooledDriver(self.factory())
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._in_use -= 1
+                self._launch_failures += 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        if waited > 1:
+            logger.info(f"[{self.name}] Waited {waited:.2f}s for a browser")
+        pooled.checked_out_at = time.monotonic()
+        return pooled
+
+    def prewarm(self, count=None):
+        # Fills idle slots ahead of demand; launches one at a time so a cold box is not swamped by Chrome starts
+        count = self.size if count is None else min(max(0, int(count)), self.size)
+        launched = 0
+        while launched < count:
+            with self._cond:
+                if self._closed or self._created >= self.size:
+                    break
+                self._created += 1
+            try:
+                with stage_timer("driver_launch", self.name):
+                    pooled = _PooledDriver(self.factory())
+            except Exception as e:
+                logger.error(f"[{self.name}] Failed to pre-launch a WebDriver: {str(e)}")
+                with self._cond:
+                    self._created -= 1
+                    self._launch_failures += 1
+                    self._cond.notify()
+                break
+            with self._cond:
+                closed = self._closed
+                if closed:
+                    self._created -= 1
+                else:
+                    self._idle.append(pooled)
+                    self._cond.notify()
+            if closed:
+                self._quit(pooled)
+                break
+            launched += 1
+        return launched
+
+    def _checkin(self, pooled):
+        pooled.pages += 1
+        held = time.monotonic() - pooled.checked_out_at
+        recycle = pooled.pages >= self.max_pages or self._closed
+        if recycle:
+            logger.info(f"[{self.name}] Recycling WebDriver after {pooled.pages} pages")
+            self._quit(pooled)
+        with self._cond:
+            self._in_use -= 1
+            self._hold_ewma = held if self._hold_ewma is None else (
+                HOLD_EWMA_ALPHA * held + (1 - HOLD_EWMA_ALPHA) * self._hold_ewma
+            )
+            if recycle:
+                self._created -= 1
+                self._recycled += 1
+            else:
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    def _is_healthy(self, pooled):
+        try:
+            pooled.driver.current_url
+            return True
+        except Exception as e:
+            logger.warning(f"[{self.name}] Health check failed: {str(e)}")
+            return False
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                "name": self.name,
+                "size": self.size,
+                "created": self._created,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "queue_depth": self._waiting,
+                "checkouts": self._checkouts,
+                "checkout_timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "health_failures": self._health_failures,
+                "launch_failures": self._launch_failures,
+                "total_wait_seconds": round(self._total_wait, 3),
+                "avg_wait_seconds": round(self._total_wait / self._checkouts, 3) if self._checkouts else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3),
+                "avg_hold_seconds": round(self._hold_ewma, 3) if self._hold_ewma is not None else None,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+        if idle:
+            logger.info(f"[{self.name}] Closed {len(idle)} pooled WebDriver instance(s)")
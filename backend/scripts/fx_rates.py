@@ -0,0 +1,158 @@
+from threading import Lock, Thread
+import json
+import logging
+import os
+import time
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SUPPORTED_CURRENCIES = ("ZAR", "USD", "GBP", "EUR", "AUD", "THB")
+FX_RATES_FILE = os.getenv("FX_RATES_FILE")
+FX_RATES_URL = os.getenv("FX_RATES_URL", "https://api.exchangerate-api.com/v4/latest/USD")
+FX_RATES_TTL = float(os.getenv("FX_RATES_TTL", 6 * 3600))
+FX_RATES_TIMEOUT = float(os.getenv("FX_RATES_TIMEOUT", 5))
+# Retry a failed refresh sooner than a full TTL, but not on every request
+FX_RATES_RETRY_SECONDS = 300
+
+# Units per USD; same fallback the frontend used when the rate API was unreachable
+DEFAULT_RATES = {"USD": 1.0, "ZAR": 18.5, "GBP": 0.79, "EUR": 0.93, "AUD": 1.52, "THB": 33.5}
+
+
+class FxRateTable:
+    def __init__(self, currencies=SUPPORTED_CURRENCIES, rates_file=FX_RATES_FILE, rates_url=FX_RATES_URL, ttl=FX_RATES_TTL):
+        self.currencies = tuple(currencies)
+        self.index = {currency: i for i, currency in enumerate(self.currencies)}
+        self.rates_file = rates_file
+        self.rates_url = rates_url
+        self.ttl = ttl
+        self._lock = Lock()
+        # numpy loads with the first rate lookup, not when the app imports this module
+        self._rates = None
+        self._source = "defaults"
+        self._loaded_at = 0.0
+        self._next_refresh = 0.0
+        self._refreshing = False
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _parse(self, payload):
+        import numpy as np
+        rates = payload.get("rates") or {}
+        base = (payload.get("base") or payload.get("base_code") or "USD").upper()
+        per_base = {currency.upper(): float(rate) for currency, rate in rates.items()}
+        per_base.setdefault(base, 1.0)
+        if "USD" not in per_base:
+            raise ValueError("rate table has no USD rate")
+        usd = per_base["USD"]
+        missing = [currency for currency in self.currencies if currency not in per_base]
+        if missing:
+            raise ValueError(f"rate table is missing {', '.join(missing)}")
+        return np.array([per_base[currency] / usd for currency in self.currencies], dtype=np.float64)
+
+    def _fetch(self):
+        if self.rates_file:
+            with open(self.rates_file, encoding="utf-8") as f:
+                return self._parse(json.load(f)), f"file:{self.rates_file}"
+        # httpx loads here, on the refresh thread, instead of on the app import path
+        import httpx
+        response = httpx.get(self.rates_url, timeout=FX_RATES_TIMEOUT)
+        response.raise_for_status()
+        return self._parse(response.json()), self.rates_url
+
+    def _claim_refresh(self, force):
+        # One refresh at a time; a failed one is retried after FX_RATES_RETRY_SECONDS, a good one after the TTL
+        now = time.time()
+        with self._lock:
+            if self._refreshing or (not force and now < self._next_refresh):
+                return False
+            self._refreshing = True
+            self._next_refresh = now + FX_RATES_RETRY_SECONDS
+            return True
+
+    def start_background_refresh(self, force=False):
+        if not self._claim_refresh(force):
+            return False
+        Thread(target=self._run_refresh, name="fx-rates", daemon=True).start()
+        return True
+
+    def refresh(self, force=False):
+        if not self._claim_refresh(force):
+            return False
+        return self._run_refresh()
+
+    def _run_refresh(self):
+        try:
+            rates, source = self._fetch()
+        except Exception as e:
+            # Anything escaping here would leave the refresh flag set and the table never refreshed again
+            with self._lock:
+                self._refreshing = False
+                self.refresh_errors += 1
+                kept = self._source
+            logger.warning(f"FX rate refresh failed, keeping {kept} rates: {str(e)}")
+            return False
+        with self._lock:
+            self._rates = rates
+            self._source = source
+            self._loaded_at = time.time()
+            self._next_refresh = self._loaded_at + self.ttl
+            self._refreshing = False
+            self.refreshes += 1
+        logger.info(f"Loaded FX rates for {', '.join(self.currencies)} from {source}")
+        return True
+
+    def rates(self):
+        # Never fetches on the caller's thread: a stale table is served while a background refresh replaces it
+        self.start_background_refresh()
+        with self._lock:
+            if self._rates is None:
+                import numpy as np
+                self._rates = np.array([DEFAULT_RATES[currency] for currency in self.currencies], dtype=np.float64)
+            return self._rates
+
+    def supports(self, currency):
+        return (currency or "").upper() in self.index
+
+    def convert_many(self, amounts, from_currencies, to_currency):
+        # One vectorised pass: amount / rate[from] * rate[to], NaN where an amount is missing
+        import numpy as np
+        rates = self.rates()
+        amounts = np.array([np.nan if amount is None else amount for amount in amounts], dtype=np.float64)
+        from_rates = rates[[self.index[currency.upper()] for currency in from_currencies]]
+        converted = np.round(amounts / from_rates * rates[self.index[to_currency.upper()]], 2)
+        return [None if np.isnan(value) else float(value) for value in converted]
+
+    def convert(self, amount, from_currency, to_currency):
+        return self.convert_many([amount], [from_currency], to_currency)[0]
+
+    def price_matrix(self, amounts, from_currency):
+        # Every amount in every supported currency: shape (len(amounts), len(currencies))
+        import numpy as np
+        rates = self.rates()
+        amounts = np.array([np.nan if amount is None else amount for amount in amounts], dtype=np.float64)
+        matrix = np.round(np.outer(amounts / rates[self.index[from_currency.upper()]], rates), 2)
+        return {
+            currency: [None if np.isnan(value) else float(value) for value in matrix[:, i]]
+            for currency, i in self.index.items()
+        }
+
+    def table(self):
+        rates = self.rates()
+        with self._lock:
+            return {
+                "base": "USD",
+                "rates": {currency: float(rates[i]) for currency, i in self.index.items()},
+                "source": self._source,
+                "loaded_at": self._loaded_at or None,
+                "ttl_seconds": self.ttl,
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "source": self._source,
+                "age_seconds": round(time.time() - self._loaded_at) if self._loaded_at else None,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+            }
@@ -0,0 +1,277 @@
+from threading import Lock
+from urllib.parse import parse_qs, urlparse
+import logging
+import os
+import re
+import unicodedata
+
+from scripts.result_cache import canonical_hotel_url
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MATCH_THRESHOLD = float(os.getenv("HOTEL_MATCH_THRESHOLD", 85))
+MATCH_WORKERS = int(os.getenv("HOTEL_MATCH_WORKERS", -1))
+# Share of the score taken from the address when both listings have one
+ADDRESS_WEIGHT = 0.25
+SITES = ("booking", "trip")
+# Search-results URL parameters that carry the destination name (Booking.com, Trip.com)
+CITY_PARAMS = ("ss", "cityName", "city_name")
+# Words both sites add or drop freely; they say nothing about which property it is
+GENERIC_TOKENS = {"hotel", "hotels", "the", "and", "a", "by", "at", "an"}
+# rapidfuzz.fuzz scorers. Plain ratio on normalized names keeps cdist on RapidFuzz's SIMD path; WRatio matched
+# about 2% more pairs in scripts/benchmark_hotel_matching.py but was ~40x slower to build the same index
+NAME_SCORER = "ratio"
+ADDRESS_SCORER = "token_sort_ratio"
+# Rows/columns the score matrix starts with; it doubles when a site outgrows it
+INITIAL_CAPACITY = 64
+
+
+def normalize_text(text, drop=()):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    text = text.replace("&", " and ")
+    return " ".join(token for token in re.split(r"[^a-z0-9]+", text) if token and token not in drop)
+
+
+def normalize_name(name):
+    return normalize_text(name, GENERIC_TOKENS)
+
+
+def normalize_city(city):
+    return normalize_text(city)
+
+
+def listing_city(list_url):
+    params = parse_qs(urlparse(list_url).query)
+    return next((params[name][0] for name in CITY_PARAMS if params.get(name)), None)
+
+
+def score_matrix(names_a, names_b, addresses_a=None, addresses_b=None, workers=MATCH_WORKERS, threshold=MATCH_THRESHOLD):
+    # All-pairs scores (len(a) x len(b), 0-100) from normalized strings in one vectorised cdist per field.
+    # numpy and rapidfuzz load with the first match, not when the app imports this module.
+    import numpy as np
+    from rapidfuzz import fuzz, process
+    if not names_a or not names_b:
+        return np.zeros((len(names_a), len(names_b)), dtype=np.float32)
+    # Names scoring below this cannot reach the threshold even with a perfect address, so they are cut to 0 early
+    name_cutoff = max(0.0, (threshold - 100 * ADDRESS_WEIGHT) / (1 - ADDRESS_WEIGHT))
+    scores = process.cdist(names_a, names_b, scorer=getattr(fuzz, NAME_SCORER), dtype=np.float32, workers=workers, score_cutoff=name_cutoff)
+    if addresses_a is None or addresses_b is None:
+        return scores
+    has_a = np.array([bool(address) for address in addresses_a])
+    has_b = np.array([bool(address) for address in addresses_b])
+    if not has_a.any() or not has_b.any():
+        return scores
+    address_scores = process.cdist(addresses_a, addresses_b, scorer=getattr(fuzz, ADDRESS_SCORER), dtype=np.float32, workers=workers)
+    blended = (1 - ADDRESS_WEIGHT) * scores + ADDRESS_WEIGHT * address_scores
+    return np.where(np.outer(has_a, has_b), blended, scores)
+
+
+def name_similarity(name_a, name_b):
+    from rapidfuzz import fuzz
+    return float(getattr(fuzz, NAME_SCORER)(normalize_name(name_a), normalize_name(name_b)))
+
+
+def _score_entries(entries, others, threshold):
+    return score_matrix(
+        [entry["name_key"] for entry in entries], [entry["name_key"] for entry in others],
+        [entry["address_key"] for entry in entries], [entry["address_key"] for entry in others],
+        threshold=threshold
+    )
+
+
+class _CityIndex:
+    def __init__(self, threshold):
+        import numpy as np
+        self.threshold = threshold
+        self.entries = {site: [] for site in SITES}
+        self.rows = {site: {} for site in SITES}
+        # Preallocated so adding listings writes into spare rows/columns instead of copying the whole matrix
+        self._buffer = np.zeros((INITIAL_CAPACITY, INITIAL_CAPACITY), dtype=np.float32)
+
+    @property
+    def scores(self):
+        # scores[i, j]: booking entry i against trip entry j
+        return self._buffer[:len(self.entries["booking"]), :len(self.entries["trip"])]
+
+    def _reserve(self, site, size):
+        import numpy as np
+        axis = 0 if site == "booking" else 1
+        if self._buffer.shape[axis] >= size:
+            return
+        shape = list(self._buffer.shape)
+        shape[axis] = max(size, 2 * shape[axis])
+        grown = np.zeros(shape, dtype=np.float32)
+        grown[:len(self.entries["booking"]), :len(self.entries["trip"])] = self.scores
+        self._buffer = grown
+
+    def _block(self, site, entries):
+        return _score_entries(entries, self.entries[_other(site)], self.threshold)
+
+    def add(self, site, entries):
+        # One entry per listing, the last one seen winning, before any of the index is touched
+        entries = list({entry["hotel_url"]: entry for entry in entries}.values())
+        new, changed = [], []
+        for entry in entries:
+            row = self.rows[site].get(entry["hotel_url"])
+            if row is None:
+                new.append(entry)
+            elif (self.entries[site][row]["name_key"], self.entries[site][row]["address_key"]) != (entry["name_key"], entry["address_key"]):
+                self.entries[site][row] = entry
+                changed.append(row)
+        if new:
+            # Only the new listings are scored, against everything already indexed on the other site
+            block = self._block(site, new)
+            start = len(self.entries[site])
+            self._reserve(site, start + len(new))
+            self.entries[site].extend(new)
+            self.rows[site].update((entry["hotel_url"], start + offset) for offset, entry in enumerate(new))
+            if site == "booking":
+                self.scores[start:, :] = block
+            else:
+                self.scores[:, start:] = block.T
+        if changed:
+            block = self._block(site, [self.entries[site][row] for row in changed])
+            if site == "booking":
+                self.scores[changed, :] = block
+            else:
+                self.scores[:, changed] = block.T
+        return len(new), len(changed)
+
+    def _scores_for(self, site, row):
+        return self.scores[row, :] if site == "booking" else self.scores[:, row]
+
+    def best_matches(self, threshold):
+        # Mutual best pairs only: neither listing has a better-scoring partner on the other site
+        import numpy as np
+        if self.scores.size == 0:
+            return []
+        best_trip = self.scores.argmax(axis=1)
+        best_booking = self.scores.argmax(axis=0)
+        rows = np.arange(self.scores.shape[0])
+        best = self.scores[rows, best_trip]
+        mutual = (best_booking[best_trip] == rows) & (best >= threshold)
+        return [
+            (self.entries["booking"][i], self.entries["trip"][best_trip[i]], float(best[i]))
+            for i in np.flatnonzero(mutual)
+        ]
+
+    def candidates(self, site, row, limit):
+        import numpy as np
+        scores = self._scores_for(site, row)
+        order = np.argsort(-scores)[:limit]
+        other = self.entries[_other(site)]
+        return [(other[i], float(scores[i])) for i in order]
+
+    def is_mutual_best(self, site, row, column):
+        return int(self._scores_for(_other(site), column).argmax()) == row
+
+
+def _other(site):
+    return "trip" if site == "booking" else "booking"
+
+
+def _entry(card):
+    hotel_url = card.get("hotel_url") or card.get("source_url")
+    return {
+        "hotel_url": canonical_hotel_url(hotel_url) if hotel_url else None,
+        "hotel_name": card.get("hotel_name"),
+        "location": card.get("location"),
+        "name_key": normalize_name(card.get("hotel_name")),
+        "address_key": normalize_text(card.get("location") if card.get("location") != "Unknown" else ""),
+    }
+
+
+def _public(entry, score=None):
+    result = {"hotel_url": entry["hotel_url"], "hotel_name": entry["hotel_name"], "location": entry["location"]}
+    if score is not None:
+        result["score"] = round(score, 1)
+    return result
+
+
+class HotelMatchIndex:
+    """Booking.com and Trip.com listings per city, with their cross-site name/address scores kept current."""
+
+    def __init__(self, threshold=MATCH_THRESHOLD):
+        self.threshold = threshold
+        self._cities = {}
+        self._lock = Lock()
+        self._stats = {"added": 0, "updated": 0, "scored_pairs": 0}
+
+    def _city(self, city, create=False):
+        key = normalize_city(city)
+        if create and key not in self._cities:
+            self._cities[key] = _CityIndex(self.threshold)
+        return self._cities.get(key)
+
+    def add(self, city, site, cards):
+        entries = [_entry(card) for card in cards if card.get("hotel_name") and (card.get("hotel_url") or card.get("source_url"))]
+        if not entries or not normalize_city(city):
+            return 0
+        with self._lock:
+            index = self._city(city, create=True)
+            other_size = len(index.entries[_other(site)])
+            added, updated = index.add(site, entries)
+            self._stats["added"] += added
+            self._stats["updated"] += updated
+            self._stats["scored_pairs"] += (added + updated) * other_size
+        if added or updated:
+            logger.info(f"Hotel index {normalize_city(city)}: +{added} new, {updated} updated {site} listings")
+        return added
+
+    def match(self, city, site, hotel_url, limit=3):
+        with self._lock:
+            index = self._city(city)
+            row = index.rows[site].get(canonical_hotel_url(hotel_url)) if index else None
+            if row is None:
+                return None
+            candidates = index.candidates(site, row, limit)
+            best = None
+            if candidates and candidates[0][1] >= self.threshold:
+                column = index.rows[_other(site)][candidates[0][0]["hotel_url"]]
+                if index.is_mutual_best(site, row, column):
+                    best = _public(*candidates[0])
+            return {
+                "hotel": _public(index.entries[site][row]),
+                "match": best,
+                "candidates": [_public(entry, score) for entry, score in candidates]
+            }
+
+    def match_names(self, city, site, cards):
+        # Scores unindexed candidates against a city's listings on the other site without adding them
+        entries = [_entry(card) for card in cards]
+        with self._lock:
+            index = self._city(city)
+            if index is None or not entries:
+                return [None] * len(entries)
+            other = index.entries[_other(site)]
+            scores = _score_entries(entries, other, self.threshold)
+        results = []
+        for row in scores:
+            if not row.size:
+                results.append(None)
+                continue
+            best = int(row.argmax())
+            results.append(_public(other[best], float(row[best])) if row[best] >= self.threshold else None)
+        return results
+
+    def pairs(self, city):
+        with self._lock:
+            index = self._city(city)
+            if index is None:
+                return []
+            return [
+                {"booking": _public(booking), "trip": _public(trip), "score": round(score, 1)}
+                for booking, trip, score in index.best_matches(self.threshold)
+            ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "cities": {
+                    city: {site: len(index.entries[site]) for site in SITES}
+                    for city, index in self._cities.items()
+                },
+                **self._stats
+            }
@@ -0,0 +1,88 @@
+from urllib.parse import urlencode
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") == "1"
+HTTP_COMPRESSION_ENABLED = os.getenv("HTTP_COMPRESSION_ENABLED", "1") == "1"
+# How long a browser or edge cache may keep answering with an expired quote while it refetches it
+SWR_AVAILABLE_SECONDS = int(os.getenv("HTTP_SWR_AVAILABLE_SECONDS", 300))
+SWR_UNAVAILABLE_SECONDS = int(os.getenv("HTTP_SWR_UNAVAILABLE_SECONDS", 60))
+# Equivalent GET queries are redirected to one spelling, which caches can keep for a day
+CANONICAL_REDIRECT_MAX_AGE = 86400
+COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", 1024))
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain"}
+GZIP_LEVEL = 6
+# 11 compresses a little smaller but costs several times the CPU of 5 on payloads this size
+BROTLI_QUALITY = 5
+
+
+def payload_etag(payload):
+    # The quote payload includes its scraped_at, so a re-scrape with the same price is still a new version
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+
+
+def cache_control(payload, status_code, ttl, age):
+    if status_code != 200 or not payload.get("success"):
+        # Errors are transient and per-attempt, a cached one would outlive the problem
+        return "no-store"
+    if payload.get("stale"):
+        # Served from history while a job refreshes it: revalidate on every use, the ETag keeps that cheap
+        return "no-cache"
+    available = payload["data"].get("availability") == "Available"
+    swr = SWR_AVAILABLE_SECONDS if available else SWR_UNAVAILABLE_SECONDS
+    max_age = max(0, int(ttl - age))
+    return f"public, max-age={max_age}, s-maxage={max_age}, stale-while-revalidate={swr}"
+
+
+def apply_cache_headers(response, request, payload, ttl, age=0):
+    # Answers 304 instead of the body when a GET already holds this version of the quote
+    if not HTTP_CACHE_ENABLED:
+        return response
+    response.headers["Cache-Control"] = cache_control(payload, response.status_code, ttl, age)
+    response.vary.add("Origin")
+    if response.headers["Cache-Control"] != "no-store":
+        # Weak, since the same quote is served gzip, brotli or plain
+        response.set_etag(payload_etag(payload), weak=True)
+        response.make_conditional(request)
+    return response
+
+
+def canonical_query(args, fields, upper=("currency",)):
+    # Known fields only, blanks dropped, sorted: one URL, and so one cache entry, per distinct query
+    return urlencode(sorted(
+        (field, args[field].upper() if field in upper else args[field])
+        for field in fields if args.get(field)
+    ))
+
+
+def choose_encoding(accept_encodings):
+    br, gz = accept_encodings.quality("br"), accept_encodings.quality("gzip")
+    if br > 0 and br >= gz:
+        return "br"
+    return "gzip" if gz > 0 else None
+
+
+def compress_response(response, accept_encodings):
+    if (not HTTP_COMPRESSION_ENABLED or response.direct_passthrough or response.is_streamed
+            or response.status_code != 200 or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None or (response.content_length or 0) < COMPRESS_MIN_BYTES:
+        return response
+    data = response.get_data()
+    if encoding == "br":
+        import brotli
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    response.headers["Content-Encoding"] = encoding
+    return response
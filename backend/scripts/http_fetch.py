@@ -0,0 +1,138 @@
+from collections import deque
+from threading import Lock
+import logging
+import os
+import time
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FAST_PATH_ENABLED = os.getenv("HTTP_FAST_PATH", "1") == "1"
+FAST_PATH_TIMEOUT = float(os.getenv("HTTP_FAST_PATH_TIMEOUT", 8))
+# Once a site's recent success rate drops below this, only every Nth request probes the fast path
+FAST_PATH_MIN_SUCCESS_RATE = float(os.getenv("HTTP_FAST_PATH_MIN_SUCCESS_RATE", 0.05))
+FAST_PATH_WINDOW = 50
+FAST_PATH_PROBE_EVERY = 10
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+_client = None
+_client_lock = Lock()
+
+
+def get_client():
+    import httpx
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                http2=True,
+                headers=BROWSER_HEADERS,
+                follow_redirects=True,
+                timeout=FAST_PATH_TIMEOUT,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+            )
+        return _client
+
+
+class _SiteStats:
+    def __init__(self):
+        self.attempts = 0
+        self.successes = 0
+        self.fetch_errors = 0
+        self.parse_misses = 0
+        self.skipped = 0
+        self.total_seconds = 0.0
+        self.recent = deque(maxlen=FAST_PATH_WINDOW)
+
+    def recent_success_rate(self):
+        return sum(self.recent) / len(self.recent) if self.recent else 1.0
+
+
+_stats = {}
+_stats_lock = Lock()
+
+
+def _site_stats(site):
+    with _stats_lock:
+        if site not in _stats:
+            _stats[site] = _SiteStats()
+        return _stats[site]
+
+
+def _should_try(stats):
+    if not FAST_PATH_ENABLED:
+        return False
+    if len(stats.recent) < FAST_PATH_WINDOW or stats.recent_success_rate() >= FAST_PATH_MIN_SUCCESS_RATE:
+        return True
+    with _stats_lock:
+        stats.skipped += 1
+        return stats.skipped % FAST_PATH_PROBE_EVERY == 0
+
+
+def try_fast_path(site, url, parse_fn, timeout=None):
+    import httpx
+    stats = _site_stats(site)
+    if not _should_try(stats):
+        return None
+
+    started = time.monotonic()
+    result = None
+    fetch_failed = False
+    try:
+        response = get_client().get(url, timeout=FAST_PATH_TIMEOUT if timeout is None else min(timeout, FAST_PATH_TIMEOUT))
+        response.raise_for_status()
+        result = parse_fn(response.text)
+    except httpx.HTTPError as e:
+        fetch_failed = True
+        logger.info(f"[{site}] HTTP fast path fetch failed: {str(e)}")
+    except Exception as e:
+        logger.warning(f"[{site}] HTTP fast path parse failed: {str(e)}")
+        result = None
+
+    elapsed = time.monotonic() - started
+    with _stats_lock:
+        stats.attempts += 1
+        stats.total_seconds += elapsed
+        stats.recent.append(1 if result is not None else 0)
+        if result is not None:
+            stats.successes += 1
+        elif fetch_failed:
+            stats.fetch_errors += 1
+        else:
+            stats.parse_misses += 1
+
+    if result is not None:
+        logger.info(f"[{site}] Served from HTTP fast path in {elapsed:.2f}s")
+    else:
+        logger.info(f"[{site}] HTTP fast path missed after {elapsed:.2f}s, falling back to WebDriver")
+    return result
+
+
+def get_fast_path_stats():
+    with _stats_lock:
+        return {
+            site: {
+                "attempts": stats.attempts,
+                "successes": stats.successes,
+                "fetch_errors": stats.fetch_errors,
+                "parse_misses": stats.parse_misses,
+                "skipped": stats.skipped,
+                "success_rate": round(stats.successes / stats.attempts, 3) if stats.attempts else 0.0,
+                "recent_success_rate": round(stats.recent_success_rate(), 3),
+                "avg_seconds": round(stats.total_seconds / stats.attempts, 3) if stats.attempts else 0.0,
+            }
+            for site, stats in _stats.items()
+        }
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
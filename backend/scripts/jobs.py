@@ -0,0 +1,174 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+import logging
+import os
+import time
+import uuid
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = int(os.getenv("SCRAPE_JOB_WORKERS", 4))
+DEFAULT_JOB_RETENTION = float(os.getenv("SCRAPE_JOB_RETENTION_SECONDS", 600))
+# Queued plus running jobs beyond which new ones are refused instead of waiting without bound
+DEFAULT_JOB_MAX_PENDING = int(os.getenv("SCRAPE_JOB_MAX_PENDING", 64))
+
+FINISHED_STATES = ("done", "failed")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """A ThreadPoolExecutor that refuses work beyond max_pending queued or running tasks."""
+
+    def __init__(self, max_workers, max_pending, thread_name_prefix):
+        self.max_pending = max(1, int(max_pending))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = Lock()
+        self._pending = 0
+        self.rejected = 0
+
+    def submit_many(self, calls):
+        # All or nothing: a batch that does not fit is refused whole, so no request is left half-queued
+        with self._lock:
+            if self._pending + len(calls) > self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self._pending} tasks are already queued or running, at most {self.max_pending}")
+            self._pending += len(calls)
+        futures = []
+        try:
+            for fn, args, kwargs in calls:
+                future = self._executor.submit(fn, *args, **kwargs)
+                future.add_done_callback(self._release)
+                futures.append(future)
+        except Exception:
+            # e.g. RuntimeError after shutdown: hand back the slots never submitted, and cancel the rest of the
+            # batch (their done callbacks release theirs) so it stays all or nothing
+            with self._lock:
+                self._pending -= len(calls) - len(futures)
+            for future in futures:
+                future.cancel()
+            raise
+        return futures
+
+    def submit(self, fn, *args, **kwargs):
+        return self.submit_many([(fn, args, kwargs)])[0]
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    def shutdown(self, wait=False, cancel_futures=True):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class _Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.version = 0
+
+    def snapshot(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, retention=DEFAULT_JOB_RETENTION, max_pending=DEFAULT_JOB_MAX_PENDING):
+        self.retention = retention
+        self._executor = BoundedExecutor(max_workers, max_pending, "scrape-job")
+        self._jobs = {}
+        self._cond = Condition()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        # Raises QueueFull when max_pending jobs are already queued or running
+        job = _Job(kind)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        with self._cond:
+            self._purge_expired()
+            self._jobs[job.id] = job
+        logger.info(f"Queued {kind} job {job.id}")
+        return job.snapshot()
+
+    def _run(self, job, fn, args, kwargs):
+        self._update(job, status="running", started_at=time.time())
+        try:
+            result = fn(*args, **kwargs)
+            self._update(job, status="done", result=result, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {str(e)}")
+            self._update(job, status="failed", error=str(e), finished_at=time.time())
+
+    def _update(self, job, **fields):
+        with self._cond:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._cond.notify_all()
+
+    def get(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job is not None else None
+
+    def wait_for_change(self, job_id, seen_version, timeout):
+        # Returns (snapshot, version) once the job moves past seen_version or timeout elapses
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return None, seen_version
+                if job.version != seen_version:
+                    return job.snapshot(), job.version
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job.snapshot(), job.version
+                self._cond.wait(remaining)
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in FINISHED_STATES and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._cond:
+            self._purge_expired()
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "retained": len(self._jobs),
+                "by_status": counts,
+                "retention_seconds": self.retention,
+                "pending": self._executor.pending(),
+                "max_pending": self._executor.max_pending,
+                "rejected": self._executor.rejected
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,223 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+# Usage (from backend/):
+#   python -m scripts.loadtest --configs 1x4,2x4,4x4 --concurrency 8,32 --duration 60
+#   python -m scripts.loadtest --target http://127.0.0.1:5000 --concurrency 16
+#
+# --configs starts one gunicorn per WORKERSxTHREADS entry with SCRAPER_STUB=1, so no browser or network is used.
+# --target drives a server you started yourself (start it with SCRAPER_STUB=1 for stubbed scrapes).
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_MIX = "scrape-booking=4,scrape-trip=4,compare=1,price-calendar=1"
+
+
+def booking_url(hotel):
+    return f"https://www.booking.com/hotel/za/loadtest-{hotel}.html"
+
+
+def trip_url(hotel):
+    return f"https://www.trip.com/hotels/detail/?hotelId={hotel}"
+
+
+def stay(days_ahead):
+    checkin = datetime.now().date() + timedelta(days=days_ahead)
+    return checkin.strftime('%Y-%m-%d'), (checkin + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def build_request(endpoint, hotels):
+    # Random hotel x date keeps the quote cache hit rate close to production (mostly misses)
+    hotel = random.randrange(hotels)
+    checkin, checkout = stay(random.randint(1, 60))
+    if endpoint == "scrape-booking":
+        return "/scrape-booking", {"hotelUrl": booking_url(hotel), "checkIn": checkin, "checkOut": checkout}
+    if endpoint == "scrape-trip":
+        return "/scrape-trip", {"hotelUrl": trip_url(hotel), "checkIn": checkin, "checkOut": checkout}
+    if endpoint == "compare":
+        batch = random.sample(range(hotels), min(5, hotels))
+        return "/compare", {
+            "checkIn": checkin,
+            "checkOut": checkout,
+            "hotels": [{"id": h, "booking_dot_com_affiliate_url": booking_url(h), "trip_dot_com_affiliate_url": trip_url(h)} for h in batch]
+        }
+    if endpoint == "price-calendar":
+        site = random.choice(("booking", "trip"))
+        last, _ = stay(random.randint(8, 60))
+        first = (datetime.strptime(last, '%Y-%m-%d') - timedelta(days=6)).strftime('%Y-%m-%d')
+        return "/price-calendar", {
+            "site": site,
+            "hotelUrl": booking_url(hotel) if site == "booking" else trip_url(hotel),
+            "from": first,
+            "to": last
+        }
+    raise ValueError(f"Unknown endpoint {endpoint}")
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def collect_pool_stats(base_url, probes=40):
+    # Each gunicorn worker owns its pool, so sample /pool-status on fresh connections until every pid has answered
+    workers = {}
+    for _ in range(probes):
+        try:
+            status = httpx.get(f"{base_url}/pool-status", headers={"Connection": "close"}, timeout=10).json()
+        except httpx.HTTPError:
+            continue
+        workers[status.get("pid")] = status
+    totals = {"workers": len(workers), "checkouts": 0, "total_wait_seconds": 0.0, "scrapes": 0, "scrape_seconds": 0.0, "checkout_timeouts": 0}
+    for status in workers.values():
+        browser, stub = status.get("browser", {}), status.get("stub_scraper", {})
+        totals["checkouts"] += browser.get("checkouts", 0)
+        totals["total_wait_seconds"] += browser.get("total_wait_seconds", 0.0)
+        totals["checkout_timeouts"] += browser.get("checkout_timeouts", 0)
+        totals["scrapes"] += stub.get("scrapes", 0)
+        totals["scrape_seconds"] += stub.get("scrape_seconds", 0.0)
+    return totals
+
+
+def run_load(base_url, concurrency, duration, weights, hotels):
+    endpoints, endpoint_weights = zip(*weights.items())
+    deadline = time.monotonic() + duration
+    samples = {endpoint: [] for endpoint in endpoints}
+
+    def worker(client):
+        while time.monotonic() < deadline:
+            endpoint = random.choices(endpoints, endpoint_weights)[0]
+            path, body = build_request(endpoint, hotels)
+            started = time.perf_counter()
+            try:
+                response = client.post(f"{base_url}{path}", json=body, timeout=180)
+                ok = response.status_code < 400 and response.json().get("success", True) is not False
+                status = response.status_code
+            except (httpx.HTTPError, ValueError):
+                ok, status = False, "error"
+            samples[endpoint].append((time.perf_counter() - started, ok, status))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    with httpx.Client(limits=limits) as client:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(worker, client)
+        elapsed = time.monotonic() - started
+    return samples, elapsed
+
+
+def report(label, samples, elapsed, pool_before, pool_after):
+    total = sum(len(values) for values in samples.values())
+    print(f"\n== {label}: {total} requests in {elapsed:.1f}s, {total / elapsed:.2f} req/s")
+    print(f"{'endpoint':<16}{'count':>7}{'ok %':>7}{'shed %':>8}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'max s':>9}")
+    for endpoint, values in samples.items():
+        if not values:
+            continue
+        latencies = [value[0] for value in values]
+        ok = sum(1 for value in values if value[1])
+        shed = sum(1 for value in values if value[2] in (429, 503))
+        print(
+            f"{endpoint:<16}{len(values):>7}{100 * ok / len(values):>7.1f}{100 * shed / len(values):>8.1f}"
+            f"{percentile(latencies, 0.5):>9.2f}{percentile(latencies, 0.95):>9.2f}"
+            f"{percentile(latencies, 0.99):>9.2f}{max(latencies):>9.2f}"
+        )
+    checkouts = pool_after["checkouts"] - pool_before["checkouts"]
+    scrapes = pool_after["scrapes"] - pool_before["scrapes"]
+    wait = pool_after["total_wait_seconds"] - pool_before["total_wait_seconds"]
+    scrape_time = pool_after["scrape_seconds"] - pool_before["scrape_seconds"]
+    print(
+        f"pool: {pool_after['workers']} worker(s) sampled, {checkouts} checkouts, "
+        f"avg queue wait {wait / checkouts if checkouts else 0:.2f}s, "
+        f"avg scrape {scrape_time / scrapes if scrapes else 0:.2f}s, "
+        f"checkout timeouts {pool_after['checkout_timeouts'] - pool_before['checkout_timeouts']}"
+    )
+
+
+def start_server(workers, threads, port, args):
+    env = {
+        **os.environ,
+        "SCRAPER_STUB": "1",
+        "SCRAPER_STUB_LATENCY": args.latency,
+        "SCRAPER_STUB_ERROR_RATE": str(args.error_rate),
+        "SCRAPER_POOL_SIZE": str(args.pool_size),
+        "PRICE_HISTORY": "0",
+        "PREWARM_ENABLED": "0",
+        # Every simulated client shares one address; admission shedding stays on
+        "RATE_LIMIT_ENABLED": "0",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "--threads", str(threads),
+         "-b", f"127.0.0.1:{port}", "--timeout", "300", "--log-level", "warning", "app:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(base_url, timeout=1)
+            return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn {workers}x{threads} did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the backend with concurrent load against a stub scraper")
+    parser.add_argument("--target", help="Base URL of an already running server")
+    parser.add_argument("--configs", default="1x4", help="Comma-separated gunicorn WORKERSxTHREADS to start and compare")
+    parser.add_argument("--concurrency", default="8", help="Comma-separated numbers of concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. scrape-booking=1,compare=1")
+    parser.add_argument("--hotels", type=int, default=200, help="Distinct fake hotels to spread requests over")
+    parser.add_argument("--latency", default="lognormal:3,0.5", help="Stub scrape latency (fixed:S, uniform:A,B, lognormal:MEDIAN,SIGMA)")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--pool-size", type=int, default=2, help="Browser pool size per worker")
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    if args.target:
+        targets = [(args.target, None, "target")]
+    else:
+        targets = []
+        for config in args.configs.split(","):
+            workers, threads = (int(value) for value in config.lower().split("x"))
+            targets.append((None, (workers, threads), f"gunicorn {workers} worker(s) x {threads} thread(s)"))
+
+    for base_url, config, label in targets:
+        process = None
+        if config:
+            process, base_url = start_server(*config, args.port, args)
+        try:
+            for concurrency in levels:
+                before = collect_pool_stats(base_url)
+                samples, elapsed = run_load(base_url, concurrency, args.duration, weights, args.hotels)
+                after = collect_pool_stats(base_url)
+                report(f"{label}, {concurrency} clients", samples, elapsed, before, after)
+        finally:
+            if process:
+                process.terminate()
+                process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
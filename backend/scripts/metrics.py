@@ -0,0 +1,173 @@
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from threading import Lock, local
+import logging
+import os
+import time
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+_registry = []
+_registry_lock = Lock()
+_trace = local()
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+        self._values = {}
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _render_value(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {round(total, 6)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class GaugeCallback(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames, callback):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} failed: {str(e)}")
+            return lines
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+HTTP_REQUESTS = Counter("travelaz_http_requests_total", "HTTP requests handled", ("endpoint", "method", "status"))
+HTTP_LATENCY = Histogram("travelaz_http_request_seconds", "HTTP request latency", ("endpoint",))
+STAGE_LATENCY = Histogram("travelaz_stage_seconds", "Time spent per scrape stage", ("stage", "site"))
+SCRAPES = Counter("travelaz_scrapes_total", "Scrapes by site, path and outcome", ("site", "path", "outcome"))
+SCRAPE_RETRIES = Counter("travelaz_scrape_retries_total", "Page load retries", ("site",))
+SCRAPE_FAILURES = Counter("travelaz_scrape_failures_total", "Failed scrapes by reason", ("site", "reason"))
+CACHE_LOOKUPS = Counter("travelaz_quote_cache_lookups_total", "Quote cache lookups", ("site", "result"))
+ADMISSION_REJECTIONS = Counter("travelaz_admission_rejections_total", "Requests shed before scraping", ("reason",))
+
+
+def observe_stage(stage, site, seconds):
+    if not METRICS_ENABLED:
+        return
+    STAGE_LATENCY.observe(seconds, stage=stage, site=site)
+    timings = getattr(_trace, "timings", None)
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def _stage_timer(stage, site):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, site, time.perf_counter() - started)
+
+
+def stage_timer(stage, site="all"):
+    return _stage_timer(stage, site) if METRICS_ENABLED else nullcontext()
+
+
+@contextmanager
+def _request_trace(label):
+    outer = getattr(_trace, "timings", None)
+    _trace.timings = {}
+    started = time.perf_counter()
+    try:
+        yield _trace.timings
+    finally:
+        timings, _trace.timings = _trace.timings, outer
+        summary = " ".join(f"{stage}={seconds:.3f}s" for stage, seconds in timings.items())
+        logger.info(f"{label} stages: total={time.perf_counter() - started:.3f}s {summary}")
+
+
+def request_trace(label):
+    """Collects every stage_timer on this thread into one log line when the block exits."""
+    return _request_trace(label) if METRICS_ENABLED else nullcontext({})
+
+
+def render_metrics():
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,57 @@
+import re
+
+# Longest tokens first so "US$" wins over "$" and "ZAR" over "R"
+CURRENCY_TOKENS = {
+    "US$": "USD", "USD": "USD", "$": "USD",
+    "A$": "AUD", "AU$": "AUD", "AUD": "AUD",
+    "ZAR": "ZAR", "R": "ZAR",
+    "GBP": "GBP", "£": "GBP",
+    "EUR": "EUR", "€": "EUR",
+    "THB": "THB", "฿": "THB",
+}
+
+_TOKEN_PATTERN = "|".join(re.escape(token) for token in sorted(CURRENCY_TOKENS, key=len, reverse=True))
+# Letter tokens must stand alone ("R 1 200" but not "Rooms 2"); symbols may touch the number
+_CURRENCY = rf"(?<![A-Za-z])(?:{_TOKEN_PATTERN})(?![A-Za-z])"
+_GROUP = r"[.,\s']"
+_NUMBER = rf"\d{{1,3}}(?:{_GROUP}\d{{3}})+(?:[.,]\d{{1,2}})?|\d+(?:[.,]\d{{1,2}})?"
+
+MONEY_PATTERN = re.compile(
+    rf"(?P<before>{_CURRENCY})?\s*(?P<amount>{_NUMBER})(?!\d)(?:\s*(?P<after>{_CURRENCY}))?"
+)
+_SEPARATORS = re.compile(r"[\s']")
+
+
+def parse_amount(number):
+    number = _SEPARATORS.sub("", number)
+    last_dot, last_comma = number.rfind("."), number.rfind(",")
+    if last_dot != -1 and last_comma != -1:
+        decimal = "." if last_dot > last_comma else ","
+    elif last_dot == -1 and last_comma == -1:
+        return float(number)
+    else:
+        decimal = "." if last_dot != -1 else ","
+        # A lone separator followed by exactly three digits groups thousands ("1,234", "1.234")
+        if number.count(decimal) > 1 or len(number) - number.rfind(decimal) - 1 == 3:
+            return float(number.replace(decimal, ""))
+    thousands = "," if decimal == "." else "."
+    return float(number.replace(thousands, "").replace(decimal, "."))
+
+
+def parse_money(text, default_currency=None):
+    """Return (amount, currency) for the first price in text.
+
+    A match with a currency marker is preferred over a bare number; currency falls back to default_currency.
+    """
+    if not text:
+        return None, default_currency
+    first = None
+    for match in MONEY_PATTERN.finditer(text):
+        token = match.group("before") or match.group("after")
+        if token:
+            return parse_amount(match.group("amount")), CURRENCY_TOKENS[token]
+        if first is None:
+            first = match
+    if first is None:
+        return None, default_currency
+    return parse_amount(first.group("amount")), default_currency
@@ -0,0 +1,119 @@
+from urllib.parse import urljoin
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class Field:
+    def __init__(self, selector=None, prop="innerText", transform=None, required=True, default=None):
+        self.selector = selector
+        self.prop = prop
+        self.transform = transform
+        self.required = required
+        self.default = default
+
+    def to_js(self):
+        return {"selector": self.selector, "prop": self.prop}
+
+
+class Root:
+    # many=True extracts every match of the selector as a list instead of the first match
+    def __init__(self, selector, fields, many=False):
+        self.selector = selector
+        self.fields = fields
+        self.many = many
+
+    def to_js(self):
+        return {
+            "root": self.selector,
+            "many": self.many,
+            "fields": {name: field.to_js() for name, field in self.fields.items()},
+        }
+
+
+# Runs every root/field lookup in the page and returns plain strings in one round trip
+EXTRACTION_SCRIPT = """
+const roots = arguments[0];
+const out = {};
+const readFields = (root, fields) => {
+    const values = {};
+    for (const [field, f] of Object.entries(fields)) {
+        const el = f.selector ? root.querySelector(f.selector) : root;
+        if (!el) {
+            values[field] = null;
+            continue;
+        }
+        const value = f.prop === 'innerText' ? el.innerText : el[f.prop];
+        values[field] = value == null ? null : String(value).trim();
+    }
+    return values;
+};
+for (const [name, spec] of Object.entries(roots)) {
+    if (spec.many) {
+        out[name] = Array.from(document.querySelectorAll(spec.root), root => readFields(root, spec.fields));
+        continue;
+    }
+    const root = document.querySelector(spec.root);
+    out[name] = root ? readFields(root, spec.fields) : null;
+}
+return out;
+"""
+
+
+def extract_from_driver(driver, roots):
+    payload = {name: root.to_js() for name, root in roots.items()}
+    return driver.execute_script(EXTRACTION_SCRIPT, payload)
+
+
+def _soup_value(element, prop, base_url):
+    if prop == "innerText":
+        return element.get_text(" ", strip=True)
+    value = element.get(prop)
+    if value is None:
+        return None
+    if isinstance(value, list):
+        value = " ".join(value)
+    if prop in ("href", "src"):
+        return urljoin(base_url, value)
+    return value.strip()
+
+
+def _soup_fields(root_element, fields, base_url):
+    values = {}
+    for field_name, field in fields.items():
+        element = root_element.select_one(field.selector) if field.selector else root_element
+        values[field_name] = _soup_value(element, field.prop, base_url) if element is not None else None
+    return values
+
+
+def extract_from_soup(soup, roots, base_url):
+    out = {}
+    for name, root in roots.items():
+        if root.many:
+            out[name] = [_soup_fields(element, root.fields, base_url) for element in soup.select(root.selector)]
+            continue
+        root_element = soup.select_one(root.selector)
+        out[name] = _soup_fields(root_element, root.fields, base_url) if root_element is not None else None
+    return out
+
+
+def apply_fields(raw, fields):
+    values = {}
+    missing = []
+    for name, field in fields.items():
+        value = raw.get(name)
+        if value is None:
+            if field.required:
+                missing.append(name)
+            values[name] = field.default
+            continue
+        values[name] = field.transform(value) if field.transform else value
+    return values, missing
+
+
+def require_fields(raw, fields, what):
+    values, missing = apply_fields(raw, fields)
+    if missing:
+        raise ExtractionError(f"Missing {', '.join(missing)} on {what}")
+    return values
@@ -0,0 +1,282 @@
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+import logging
+import os
+import tempfile
+import time
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "0") == "1"
+PREWARM_CITIES = [city.strip() for city in os.getenv("PREWARM_CITIES", "Durban,Cape Town,Bangkok").split(",") if city.strip()]
+# Check-in offsets in days from today; each window is a one-night stay unless PREWARM_NIGHTS says otherwise
+PREWARM_CHECKIN_OFFSETS = [int(day) for day in os.getenv("PREWARM_CHECKIN_OFFSETS", "0,1,7,14").split(",") if day.strip()]
+PREWARM_NIGHTS = int(os.getenv("PREWARM_NIGHTS", 1))
+# Occupancies as adults:children:rooms
+PREWARM_OCCUPANCIES = [
+    tuple(int(part) for part in occupancy.split(":"))
+    for occupancy in os.getenv("PREWARM_OCCUPANCIES", "2:0:1").split(",") if occupancy.strip()
+]
+PREWARM_BUDGET_PER_MINUTE = float(os.getenv("PREWARM_BUDGET_PER_MINUTE", 4))
+PREWARM_MIN_REFRESH_SECONDS = float(os.getenv("PREWARM_MIN_REFRESH_SECONDS", 600))
+PREWARM_HOTELS_REFRESH_SECONDS = float(os.getenv("PREWARM_HOTELS_REFRESH_SECONDS", 1800))
+POPULARITY_HALF_LIFE = float(os.getenv("PREWARM_POPULARITY_HALF_LIFE", 3600))
+# Every gunicorn worker starts a pre-warmer; only the one holding this lock runs, so the budget is per host
+PREWARM_LOCK_PATH = os.getenv("PREWARM_LOCK_PATH", os.path.join(tempfile.gettempdir(), "travelaz-prewarmer.lock"))
+LEADER_RETRY_SECONDS = 60
+MAX_TRACKED_REQUESTS = 2000
+
+SITE_URL_FIELDS = {
+    "booking": "booking_dot_com_affiliate_url",
+    "trip": "trip_dot_com_affiliate_url",
+}
+
+
+def load_accommodations(cities=None):
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        logger.warning("SUPABASE_URL/SUPABASE_KEY not set, pre-warmer only follows live requests")
+        return []
+
+    from supabase import create_client
+
+    client = create_client(url, key)
+    hotels = []
+    for city in cities or PREWARM_CITIES:
+        response = client.table('accommodations') \
+            .select('id,name,city,booking_dot_com_affiliate_url,trip_dot_com_affiliate_url') \
+            .ilike('city', f'%{city}%') \
+            .execute()
+        hotels.extend(response.data or [])
+    logger.info(f"Pre-warmer loaded {len(hotels)} accommodations for {', '.join(cities or PREWARM_CITIES)}")
+    return hotels
+
+
+def _same_currency(site, currency):
+    return currency
+
+
+def _task_key(site, data, scrape_currency=_same_currency):
+    # Keyed on the currency the site is scraped in, not the display currency, so one task covers every display
+    # currency that shares a cached quote
+    return (
+        site, data['hotelUrl'], data['checkIn'], data['checkOut'],
+        int(data.get('adults', 2)), int(data.get('children', 0)), int(data.get('rooms', 1)),
+        data.get('child_ages') or '', scrape_currency(site, (data.get('currency') or 'USD').upper()).upper()
+    )
+
+
+def _task_data(key):
+    site, hotel_url, checkin, checkout, adults, children, rooms, child_ages, currency = key
+    data = {
+        'hotelUrl': hotel_url, 'checkIn': checkin, 'checkOut': checkout,
+        'adults': adults, 'children': children, 'rooms': rooms, 'currency': currency
+    }
+    if child_ages:
+        data['child_ages'] = child_ages
+    return site, data
+
+
+class _TokenBucket:
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute)
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until_token(self):
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate else 60.0
+
+
+class _LeaderLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        # Non-blocking flock; the OS releases it when the holding worker exits, and another worker takes over
+        if self._file is not None:
+            return True
+        try:
+            import fcntl
+        except ImportError:
+            # No flock (Windows dev server), where there is only one process anyway
+            self._file = True
+            return True
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+
+class Prewarmer:
+    def __init__(self, refresh_fn, is_busy=None, hotel_loader=load_accommodations,
+                 budget_per_minute=PREWARM_BUDGET_PER_MINUTE, min_refresh_seconds=PREWARM_MIN_REFRESH_SECONDS,
+                 scrape_currency=_same_currency, lock_path=PREWARM_LOCK_PATH):
+        self.refresh_fn = refresh_fn
+        self.is_busy = is_busy or (lambda: False)
+        self.scrape_currency = scrape_currency
+        self.hotel_loader = hotel_loader
+        self.min_refresh_seconds = min_refresh_seconds
+        self._bucket = _TokenBucket(budget_per_minute)
+        self._leader = _LeaderLock(lock_path)
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+        self._started_logged = False
+        self._hotels = []
+        self._hotels_loaded_at = 0.0
+        self._popularity = {}
+        self._refreshed_at = {}
+        self._stats = {"refreshed": 0, "failed": 0, "shed": 0, "skipped_busy": 0}
+
+    def record_request(self, site, data):
+        try:
+            key = _task_key(site, data, self.scrape_currency)
+        except (KeyError, TypeError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            score, updated = self._popularity.get(key, (0.0, now))
+            self._popularity[key] = (self._decay(score, updated, now) + 1.0, now)
+            # The request itself fills the cache, so a newly seen key starts out fresh
+            self._refreshed_at.setdefault(key, now)
+            if len(self._popularity) > MAX_TRACKED_REQUESTS:
+                coldest = min(self._popularity, key=lambda k: self._decay(*self._popularity[k], now))
+                del self._popularity[coldest]
+                self._refreshed_at.pop(coldest, None)
+
+    def _decay(self, score, updated, now):
+        return score * 0.5 ** ((now - updated) / POPULARITY_HALF_LIFE)
+
+    def _hotel_popularity(self, now):
+        by_hotel = {}
+        for key, (score, updated) in self._popularity.items():
+            by_hotel[(key[0], key[1])] = by_hotel.get((key[0], key[1]), 0.0) + self._decay(score, updated, now)
+        return by_hotel
+
+    def _candidate_tasks(self, now):
+        today = datetime.now().date()
+        candidates = set()
+        for key in self._popularity:
+            if key[2] >= today.strftime('%Y-%m-%d'):
+                candidates.add(key)
+        for hotel in self._hotels:
+            for site, field in SITE_URL_FIELDS.items():
+                hotel_url = hotel.get(field)
+                if not hotel_url:
+                    continue
+                currency = self.scrape_currency(site, 'USD').upper()
+                for offset in PREWARM_CHECKIN_OFFSETS:
+                    checkin = today + timedelta(days=offset)
+                    checkout = checkin + timedelta(days=PREWARM_NIGHTS)
+                    for adults, children, rooms in PREWARM_OCCUPANCIES:
+                        candidates.add((
+                            site, hotel_url, checkin.strftime('%Y-%m-%d'), checkout.strftime('%Y-%m-%d'),
+                            adults, children, rooms, '', currency
+                        ))
+        return candidates
+
+    def next_task(self):
+        now = time.time()
+        with self._lock:
+            hotel_popularity = self._hotel_popularity(now)
+            best_key, best_score = None, 0.0
+            for key in self._candidate_tasks(now):
+                age = now - self._refreshed_at.get(key, 0.0)
+                if age < self.min_refresh_seconds:
+                    continue
+                staleness = min(age / self.min_refresh_seconds, 10.0)
+                request_popularity = self._decay(*self._popularity[key], now) if key in self._popularity else 0.0
+                score = staleness * (1.0 + 2.0 * request_popularity + hotel_popularity.get((key[0], key[1]), 0.0))
+                if score > best_score:
+                    best_key, best_score = key, score
+            if best_key is not None:
+                self._refreshed_at[best_key] = now
+            return best_key
+
+    def _reload_hotels_if_due(self):
+        if time.time() - self._hotels_loaded_at < PREWARM_HOTELS_REFRESH_SECONDS:
+            return
+        self._hotels_loaded_at = time.time()
+        try:
+            hotels = self.hotel_loader()
+        except Exception as e:
+            logger.error(f"Pre-warmer failed to load accommodations: {str(e)}")
+            return
+        with self._lock:
+            self._hotels = hotels
+
+    def run_once(self):
+        self._reload_hotels_if_due()
+        if self.is_busy():
+            self._stats["skipped_busy"] += 1
+            return False
+        if not self._bucket.take():
+            return False
+        key = self.next_task()
+        if key is None:
+            return False
+        site, data = _task_data(key)
+        logger.info(f"Pre-warming {site} quote for {data['hotelUrl']} ({data['checkIn']} → {data['checkOut']})")
+        try:
+            result = self.refresh_fn(site, data)
+            if result.get('shed'):
+                # Admission turned it away in favour of live traffic; the task is due again next round
+                with self._lock:
+                    self._refreshed_at.pop(key, None)
+                self._stats["shed"] += 1
+                return False
+            self._stats["failed" if 'error' in result and 'availability' not in result else "refreshed"] += 1
+        except Exception as e:
+            self._stats["failed"] += 1
+            logger.error(f"Pre-warm of {data['hotelUrl']} failed: {str(e)}")
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not self._leader.acquire():
+                self._stop.wait(LEADER_RETRY_SECONDS)
+                continue
+            if not self._started_logged:
+                logger.info(f"Price pre-warmer started in process {os.getpid()}")
+                self._started_logged = True
+            if not self.run_once():
+                self._stop.wait(min(max(self._bucket.seconds_until_token(), 1.0), 30.0))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._loop, name="price-prewarmer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "leader": self._leader.held,
+                "hotels": len(self._hotels),
+                "tracked_requests": len(self._popularity),
+                **self._stats,
+            }
@@ -0,0 +1,223 @@
+from queue import Queue, Empty, Full
+from threading import Lock, Thread
+from scripts.result_cache import canonical_hotel_url
+import logging
+import os
+import sqlite3
+import time
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Off unless given a path, like QUOTE_CACHE_SQLITE_PATH; PRICE_HISTORY=0 turns a configured store off
+PRICE_HISTORY_PATH = os.getenv("PRICE_HISTORY_PATH")
+PRICE_HISTORY_ENABLED = bool(PRICE_HISTORY_PATH) and os.getenv("PRICE_HISTORY", "1") == "1"
+FLUSH_ROWS = int(os.getenv("PRICE_HISTORY_FLUSH_ROWS", 100))
+FLUSH_SECONDS = float(os.getenv("PRICE_HISTORY_FLUSH_SECONDS", 2))
+QUEUE_SIZE = 10000
+
+COLUMNS = (
+    "site", "hotel_key", "hotel_url", "hotel_name", "checkin_date", "checkout_date",
+    "adults", "children", "rooms", "currency", "price", "taxes", "availability", "room_type",
+    "source_url", "scraped_at"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_history (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    hotel_key TEXT NOT NULL,
+    hotel_url TEXT NOT NULL,
+    hotel_name TEXT,
+    checkin_date TEXT NOT NULL,
+    checkout_date TEXT NOT NULL,
+    adults INTEGER NOT NULL,
+    children INTEGER NOT NULL,
+    rooms INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    price REAL,
+    taxes REAL,
+    availability TEXT,
+    room_type TEXT,
+    source_url TEXT,
+    scraped_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_price_history_lookup
+    ON price_history (hotel_key, site, checkin_date, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_price_history_scraped_at ON price_history (scraped_at);
+"""
+
+
+def hotel_key(hotel_url):
+    # Affiliate and search parameters vary per request, the property is identified by host, path and id
+    return canonical_hotel_url(hotel_url).split("://", 1)[-1]
+
+
+class PriceHistoryStore:
+    def __init__(self, path=PRICE_HISTORY_PATH, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, enabled=PRICE_HISTORY_ENABLED):
+        self.path = path
+        self.enabled = enabled and bool(path)
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_seconds = flush_seconds
+        self._queue = Queue(maxsize=QUEUE_SIZE)
+        self._read_lock = Lock()
+        self._writer = None
+        self._writer_lock = Lock()
+        # Counters are updated from the writer thread and from request threads
+        self._stats_lock = Lock()
+        self._stats = {"queued": 0, "written": 0, "dropped": 0, "batches": 0, "write_errors": 0}
+        if self.enabled:
+            self._read_conn = self._connect()
+            self._read_conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = Thread(target=self._write_loop, name="price-history", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        statement = f"INSERT INTO price_history ({', '.join(COLUMNS)}) VALUES ({placeholders})"
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.flush_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(statement, batch)
+                with self._stats_lock:
+                    self._stats["written"] += len(batch)
+                    self._stats["batches"] += 1
+            except sqlite3.Error as e:
+                with self._stats_lock:
+                    self._stats["write_errors"] += 1
+                logger.warning(f"Failed to write {len(batch)} price history rows: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _row(self, site, search, result):
+        return (
+            site,
+            hotel_key(search['hotel_url']),
+            search['hotel_url'],
+            result.get('hotel_name'),
+            search['checkin_date'],
+            search['checkout_date'],
+            int(search.get('adults', 2)),
+            int(search.get('children', 0)),
+            int(search.get('rooms', 1)),
+            (result.get('currency') or search.get('currency') or 'USD').upper(),
+            result.get('price'),
+            result.get('taxes'),
+            result.get('availability'),
+            result.get('room_type'),
+            result.get('source_url'),
+            result.get('scraped_at') or time.time(),
+        )
+
+    def record(self, site, search, result):
+        return self.record_many(site, [(search, result)]) == 1
+
+    def record_many(self, site, quotes):
+        # quotes: (search, result) pairs; the writer thread inserts them in executemany batches
+        if not self.enabled:
+            return 0
+        # Failures (timeouts, driver errors, "no availability" pages) carry an error and are not quotes
+        rows = [self._row(site, search, result) for search, result in quotes if 'availability' in result and 'error' not in result]
+        if rows:
+            self._ensure_writer()
+        queued = 0
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except Full:
+                break
+            queued += 1
+        with self._stats_lock:
+            self._stats["queued"] += queued
+            self._stats["dropped"] += len(rows) - queued
+        return queued
+
+    def flush(self):
+        if self.enabled and self._writer is not None:
+            self._queue.join()
+
+    def _query(self, sql, params):
+        with self._read_lock:
+            return [dict(row) for row in self._read_conn.execute(sql, params).fetchall()]
+
+    def last_known(self, site, hotel_url, checkin_date, checkout_date, adults=2, children=0, rooms=1):
+        if not self.enabled:
+            return None
+        rows = self._query(
+            "SELECT * FROM price_history WHERE hotel_key = ? AND site = ? AND checkin_date = ? "
+            "AND checkout_date = ? AND adults = ? AND children = ? AND rooms = ? "
+            "ORDER BY scraped_at DESC LIMIT 1",
+            (hotel_key(hotel_url), site, checkin_date, checkout_date, int(adults), int(children), int(rooms))
+        )
+        return rows[0] if rows else None
+
+    def history(self, hotel_url, site=None, checkin_from=None, checkin_to=None, since=None, limit=500):
+        if not self.enabled:
+            return []
+        sql = "SELECT * FROM price_history WHERE hotel_key = ?"
+        params = [hotel_key(hotel_url)]
+        if site:
+            sql += " AND site = ?"
+            params.append(site)
+        if checkin_from:
+            sql += " AND checkin_date >= ?"
+            params.append(checkin_from)
+        if checkin_to:
+            sql += " AND checkin_date <= ?"
+            params.append(checkin_to)
+        if since:
+            sql += " AND scraped_at >= ?"
+            params.append(since)
+        sql += " ORDER BY scraped_at DESC LIMIT ?"
+        params.append(int(limit))
+        return self._query(sql, params)
+
+    def trend(self, hotel_url, site=None, checkin_from=None, checkin_to=None):
+        # Daily low/average/high of available prices per check-in date and currency
+        if not self.enabled:
+            return []
+        sql = (
+            "SELECT site, checkin_date, currency, date(scraped_at, 'unixepoch') AS scraped_on, "
+            "MIN(price) AS min_price, AVG(price) AS avg_price, MAX(price) AS max_price, COUNT(*) AS samples "
+            "FROM price_history WHERE hotel_key = ? AND price IS NOT NULL"
+        )
+        params = [hotel_key(hotel_url)]
+        if site:
+            sql += " AND site = ?"
+            params.append(site)
+        if checkin_from:
+            sql += " AND checkin_date >= ?"
+            params.append(checkin_from)
+        if checkin_to:
+            sql += " AND checkin_date <= ?"
+            params.append(checkin_to)
+        sql += " GROUP BY site, checkin_date, currency, scraped_on ORDER BY checkin_date, scraped_on"
+        return self._query(sql, params)
+
+    def stats(self):
+        with self._stats_lock:
+            counters = dict(self._stats)
+        return {"enabled": self.enabled, "path": self.path, "pending": self._queue.qsize(), **counters}
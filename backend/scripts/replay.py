@@ -0,0 +1,75 @@
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+import json
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FIXTURE_DIR = Path(__file__).resolve().parent.parent / "fixtures" / "replay"
+
+
+def load_manifest(fixture_dir=FIXTURE_DIR):
+    with open(Path(fixture_dir) / "manifest.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fixture_html(entry, fixture_dir=FIXTURE_DIR):
+    return (Path(fixture_dir) / entry["file"]).read_text(encoding="utf-8")
+
+
+def check_result(entry, result):
+    """Return a list of 'field: expected X, got Y' strings; empty when the result matches the fixture."""
+    mismatches = []
+    for field, expected in entry["expected"].items():
+        if field == "alternative_dates_count":
+            got = len(result.get("alternative_dates", []))
+        else:
+            got = result.get(field)
+        if isinstance(expected, float) and isinstance(got, (int, float)):
+            matches = abs(got - expected) < 0.005
+        else:
+            matches = got == expected
+        if not matches:
+            mismatches.append(f"{field}: expected {expected!r}, got {got!r}")
+    return mismatches
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    # Sites' query strings (dates, currency, occupancy) are ignored; the path picks the fixture
+    def log_message(self, format, *args):
+        logger.debug(f"Replay server: {format % args}")
+
+
+class ReplayServer:
+    """Serves the fixture corpus on 127.0.0.1 so scrapers can run unchanged against local HTML."""
+
+    def __init__(self, fixture_dir=FIXTURE_DIR, port=0):
+        handler = partial(_FixtureHandler, directory=str(fixture_dir))
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def url_for(self, entry):
+        return f"{self.base_url}/{entry['file']}"
+
+    def start(self):
+        self._thread = Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Replay server serving fixtures at {self.base_url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
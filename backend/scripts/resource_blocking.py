@@ -0,0 +1,79 @@
+import logging
+import os
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BLOCK_RESOURCES = os.getenv("SCRAPER_BLOCK_RESOURCES", "1") == "1"
+HEADLESS = os.getenv("SCRAPER_HEADLESS", "1") == "1"
+# Its own setting, so turning blocking off to debug a page leaves load timing semantics alone
+PAGE_LOAD_STRATEGY = os.getenv("SCRAPER_PAGE_LOAD_STRATEGY", "eager")
+
+BLOCKED_EXTENSIONS = [
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mp3", "m4a", "ogg",
+]
+
+# Patterns use the wildcard syntax of CDP Network.setBlockedURLs, which matches the whole URL:
+# "*.woff2" alone misses "font.woff2?v=3", so every extension also gets a query-string variant
+DEFAULT_DENY = [pattern for extension in BLOCKED_EXTENSIONS for pattern in (f"*.{extension}", f"*.{extension}?*")] + [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*googleadservices.com*", "*facebook.net*", "*facebook.com/tr*",
+    "*hotjar.com*", "*clarity.ms*", "*criteo.com*", "*criteo.net*", "*bing.com/bat*",
+    "*tiktok.com*", "*snapchat.com*", "*pinterest.com*", "*quantserve.com*", "*scorecardresearch.com*",
+    "*youtube.com*", "*ytimg.com*",
+]
+
+SITE_RULES = {
+    "booking": {
+        "deny": ["*cf.bstatic.com/xdata/images*", "*cf.bstatic.com/static/img*", "*bstatic.com/psb/capla/static/media*"],
+        "allow": [],
+    },
+    "trip": {
+        "deny": ["*ak-d.tripcdn.com/images*", "*dimg04.c-ctrip.com/images*", "*ubt-sgp.trip.com*", "*ubt.trip.com*"],
+        "allow": [],
+    },
+}
+
+
+def _env_patterns(name):
+    return [pattern.strip() for pattern in os.getenv(name, "").split(",") if pattern.strip()]
+
+
+def blocked_url_patterns(sites):
+    sites = [sites] if isinstance(sites, str) else list(sites)
+    deny = list(DEFAULT_DENY)
+    allow = set()
+    for site in sites:
+        rules = SITE_RULES.get(site, {})
+        deny += rules.get("deny", []) + _env_patterns(f"SCRAPER_BLOCK_DENY_{site.upper()}")
+        allow.update(rules.get("allow", []) + _env_patterns(f"SCRAPER_BLOCK_ALLOW_{site.upper()}"))
+    # Network.setBlockedURLs has no exception syntax, so the allow list removes deny patterns outright.
+    # A browser shared by several sites therefore honours the union of their allow lists.
+    return list(dict.fromkeys(pattern for pattern in deny if pattern not in allow))
+
+
+def configure_chrome_options(options, block_resources=None, headless=None):
+    block_resources = BLOCK_RESOURCES if block_resources is None else block_resources
+    headless = HEADLESS if headless is None else headless
+    options.page_load_strategy = PAGE_LOAD_STRATEGY
+    if headless:
+        options.add_argument('--headless=new')
+    if block_resources:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.media_stream': 2,
+        })
+    return options
+
+
+def apply_resource_blocking(driver, sites, block_resources=None):
+    block_resources = BLOCK_RESOURCES if block_resources is None else block_resources
+    if not block_resources:
+        return
+    patterns = blocked_url_patterns(sites)
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    logger.info(f"Blocking {len(patterns)} resource URL patterns")
@@ -0,0 +1,213 @@
+from collections import OrderedDict
+from threading import Lock
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = float(os.getenv("QUOTE_CACHE_TTL", 900))
+DEFAULT_UNAVAILABLE_TTL = float(os.getenv("QUOTE_CACHE_UNAVAILABLE_TTL", 120))
+DEFAULT_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", 1000))
+DEFAULT_SQLITE_PATH = os.getenv("QUOTE_CACHE_SQLITE_PATH")
+# Query parameters that identify the property itself; everything else (affiliate ids, search context) is dropped.
+# Single-hotel links are often results pages narrowed to one property, where the destination params are the identity.
+HOTEL_IDENTITY_PARAMS = ("hotelId", "hotelName", "ss", "dest_id", "dest_type", "city", "cityId", "cityName")
+
+
+def normalize_url(url):
+    parsed = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse(parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower(), fragment="", query=query))
+
+
+def canonical_hotel_url(url):
+    # The same property reached from an affiliate link, a search results card or a plain URL maps to one URL
+    parsed = urlparse(url)
+    query = urlencode([(name, value) for name, value in parse_qsl(parsed.query) if name in HOTEL_IDENTITY_PARAMS])
+    return urlunparse((parsed.scheme.lower() or "https", parsed.netloc.lower(), parsed.path.rstrip("/"), "", query, ""))
+
+
+def make_cache_key(site, search_url, currency=None):
+    raw = f"{site}|{normalize_url(search_url)}|{(currency or '').upper()}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, expires_at, stored_at, value):
+        self.set_many([(key, expires_at, stored_at, value)])
+
+    def set_many(self, entries):
+        with self._lock:
+            for key, expires_at, stored_at, value in entries:
+                self._entries[key] = (expires_at, stored_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS quote_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_quote_cache_stored_at ON quote_cache (stored_at)")
+        self._conn.commit()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, stored_at, value FROM quote_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def set(self, key, expires_at, stored_at, value):
+        self.set_many([(key, expires_at, stored_at, value)])
+
+    def set_many(self, entries):
+        rows = [(key, json.dumps(value), expires_at, stored_at) for key, expires_at, stored_at, value in entries]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO quote_cache (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute("DELETE FROM quote_cache WHERE expires_at <= ?", (time.time(),))
+            overflow = self._conn.execute("SELECT COUNT(*) FROM quote_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM quote_cache WHERE key IN (SELECT key FROM quote_cache ORDER BY stored_at LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM quote_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM quote_cache").fetchone()[0]
+
+
+class QuoteCache:
+    def __init__(self, ttl=DEFAULT_TTL, unavailable_ttl=DEFAULT_UNAVAILABLE_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES, sqlite_path=DEFAULT_SQLITE_PATH):
+        self.ttl = ttl
+        self.unavailable_ttl = unavailable_ttl
+        self._memory = MemoryBackend(max_entries)
+        self._shared = None
+        if sqlite_path:
+            try:
+                self._shared = SQLiteBackend(sqlite_path, max_entries)
+                logger.info(f"Quote cache shared backend: SQLite at {sqlite_path}")
+            except sqlite3.Error as e:
+                logger.error(f"Failed to open quote cache at {sqlite_path}, using memory only: {str(e)}")
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, result):
+        if 'error' in result or result.get('availability') != 'Available':
+            return self.unavailable_ttl
+        return self.ttl
+
+    def get(self, key, record=True):
+        entry = self._memory.get(key)
+        if entry is None and self._shared is not None:
+            try:
+                entry = self._shared.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Quote cache read failed: {str(e)}")
+            if entry is not None:
+                self._memory.set(key, *entry)
+        if entry is None:
+            if record:
+                with self._lock:
+                    self.misses += 1
+            return None
+        if record:
+            with self._lock:
+                self.hits += 1
+        return copy.deepcopy(entry[2])
+
+    def set(self, key, result):
+        self.set_many([(key, result)])
+
+    def set_many(self, items):
+        # One lock round and, with the shared backend, one SQLite transaction for the whole batch
+        stored_at = time.time()
+        # Stamped on the caller's result too, so the response that triggered the scrape and later hits agree
+        for _, result in items:
+            result.setdefault('scraped_at', stored_at)
+        entries = [(key, stored_at + self.ttl_for(result), stored_at, copy.deepcopy(result)) for key, result in items]
+        if not entries:
+            return
+        self._memory.set_many(entries)
+        if self._shared is not None:
+            try:
+                self._shared.set_many(entries)
+            except sqlite3.Error as e:
+                logger.warning(f"Quote cache write failed: {str(e)}")
+
+    def invalidate(self, key):
+        self._memory.delete(key)
+        if self._shared is not None:
+            self._shared.delete(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "max_entries": self._memory.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._memory.evictions,
+                "ttl_seconds": self.ttl,
+                "unavailable_ttl_seconds": self.unavailable_ttl,
+                "shared_backend": self._shared.path if self._shared is not None else None,
+            }
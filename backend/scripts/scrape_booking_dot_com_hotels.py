@@ -1,65 +1,29 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from datetime import datetime, timedelta
-import json
-import time
-import os
-import re
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 import logging
-from threading import Lock
-import random
+from scripts.page_extraction import ExtractionError, Field, Root, require_fields
+from scripts.scraping_engine import (
+    ScraperProvider, register_provider, scrape_hotel, scrape_listing, extract_price, detect_currency,
+    generate_alternative_dates
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-SCREENSHOTS_DIR = "screenshots"
-os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
-
-_driver = None
-_driver_lock = Lock()
-
-def setup_driver():
-    global _driver
-    with _driver_lock:  
-        if _driver is None:
-            try:
-                options = webdriver.ChromeOptions()
-                options.add_argument('--ignore-certificate-errors')
-                options.add_argument('--disable-dev-shm-usage')
-                options.add_argument('--no-sandbox')
-                options.add_argument('--window-size=1920,1080')
-                options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36')
-                options.add_argument('--disable-cache')
-                options.add_argument('--disable-blink-features=AutomationControlled')
-                options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                options.add_experimental_option('useAutomationExtension', False)
-                
-                service = Service(ChromeDriverManager().install())
-                _driver = webdriver.Chrome(service=service, options=options)
-                
-                _driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-                    'source': '''
-                        Object.defineProperty(navigator, 'webdriver', {
-                            get: () => undefined
-                        })
-                    '''
-                })
-                
-                logger.info(f"Initialized new WebDriver instance with ChromeDriver at {service.path}")
-                logger.info(f"Chrome version: {_driver.capabilities['browserVersion']}")
-                logger.info(f"ChromeDriver version: {_driver.capabilities['chrome']['chromedriverVersion']}")
-            except Exception as e:
-                logger.error(f"Failed to initialize WebDriver: {str(e)}")
-                raise
-        return _driver
-
-def modify_hotel_url(original_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD'):
+PROPERTY_CARD_SELECTOR = "[data-testid='property-card']"
+UNAVAILABLE_SELECTOR = "div.dc52072838.a4719dfa47.adf3e7e5ef.ddf2554a1e"
+UNAVAILABLE_MESSAGE_SELECTOR = "p.b99b6ef58f.c8075b5e6a"
+TITLE_SELECTOR = "div[data-testid='title']"
+RATING_SELECTOR = "div[data-testid='review-score'] .dff2e52086"
+REVIEWS_SELECTOR = "div[data-testid='review-score'] .fff1944c52.fb14de7f14.eaa8455879"
+ADDRESS_SELECTOR = "span[data-testid='address']"
+DISTANCE_SELECTOR = "span[data-testid='distance']"
+AVAILABILITY_LINK_SELECTOR = "a[data-testid='availability-cta-btn']"
+ROOM_TYPE_SELECTOR = "div[data-testid='recommended-units'] h4"
+PRICE_SELECTOR = "span[data-testid='price-and-discounted-price']"
+TAXES_SELECTOR = "div[data-testid='taxes-and-charges']"
+RESULTS_PER_PAGE = 25
+
+def modify_hotel_url(original_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD', child_ages=''):
     parsed = urlparse(original_url)
     query_params = parse_qs(parsed.query)
     
@@ -69,6 +33,10 @@ def modify_hotel_url(original_url, checkin_date, checkout_date, adults=2, childr
     query_params['group_children'] = [str(children)]
     query_params['no_rooms'] = [str(rooms)]
     query_params['selected_currency'] = [currency.upper()]
+    if child_ages:
+        query_params['age'] = [age.strip() for age in str(child_ages).split(',') if age.strip()]
+    else:
+        query_params.pop('age', None)
     
     for param in ['changed_currency', 'hlrd', 'req_adults', 'req_children', 'req_room']:
         if param in query_params:
@@ -78,177 +46,132 @@ def modify_hotel_url(original_url, checkin_date, checkout_date, adults=2, childr
     logger.info(f"Modified hotel URL with currency {currency}: {new_query}")
     return urlunparse(parsed._replace(query=new_query))
 
-def extract_price(price_text):
-    if not price_text:
-        return None
-    numbers = re.findall(r'[\d,]+(?:\.\d+)?', price_text.replace(",", ""))
-    return float(numbers[0]) if numbers else None
-
-def detect_currency(page_text, requested_currency):
-    if requested_currency.upper() in page_text.upper():
-        return requested_currency.upper()
-    if "ZAR" in page_text or "R" in page_text:
-        return "ZAR"
-    elif "$" in page_text or "US$" in page_text:
-        return "USD"
-    elif "£" in page_text:
-        return "GBP"
-    elif "€" in page_text:
-        return "EUR"
-    elif "A$" in page_text:
-        return "AUD"
-    elif "฿" in page_text:
-        return "THB"
-    return requested_currency.upper()
-
-def generate_alternative_dates(checkin_date, checkout_date):
-    try:
-        checkin_dt = datetime.strptime(checkin_date, '%Y-%m-%d').date()
-        checkout_dt = datetime.strptime(checkout_date, '%Y-%m-%d').date()
-        alternatives = []
-        
-        if (checkout_dt - checkin_dt).days == 1:
-            new_checkout = checkin_dt + timedelta(days=2)
-            alternatives.append({
-                "checkin_date": checkin_dt.strftime('%Y-%m-%d'),
-                "checkout_date": new_checkout.strftime('%Y-%m-%d'),
-                "nights": 2,
-                "dates": f"{checkin_dt.strftime('%b %d')} - {new_checkout.strftime('%b %d')}",
-                "price": 0,
-                "taxes": 0,
-                "currency": "USD"
-            })
-        return alternatives
-    except ValueError:
-        return []
-
-def scrape_booking_hotel(hotel_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD'):
-    try:
-        checkin_dt = datetime.strptime(checkin_date, '%Y-%m-%d').date()
-        checkout_dt = datetime.strptime(checkout_date, '%Y-%m-%d').date()
-        if checkin_dt >= checkout_dt:
-            logger.error("Invalid dates: check-out must be after check-in")
-            return {"error": "Check-out date must be after check-in date"}
-        if checkin_dt < datetime.now().date():
-            logger.error("Invalid dates: check-in date cannot be in the past")
-            return {"error": "Check-in date cannot be in the past"}
-    except ValueError:
-        logger.error("Invalid date format")
-        return {"error": "Invalid date format, expected YYYY-MM-DD"}
-
-    logger.info(f"Processing dates: checkIn={checkin_date}, checkOut={checkout_date}, currency={currency}")
-
-    driver = setup_driver()
-    try:
-        search_url = modify_hotel_url(hotel_url, checkin_date, checkout_date, adults, children, rooms, currency)
-        logger.info(f"Loading hotel URL: {search_url}")
-        
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                driver.get(search_url)
-                WebDriverWait(driver, 20).until(
-                    EC.any_of(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='property-card']")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.dc52072838.a4719dfa47.adf3e7e5ef.ddf2554a1e"))
-                    )
-                )
-                break
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise
-                logger.warning(f"Attempt {attempt + 1} failed, retrying...")
-                time.sleep(random.uniform(2, 4))
-        
-        with open('page_content.html', 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
-        
-        try:
-            unavailability_div = driver.find_element(By.CSS_SELECTOR, "div.dc52072838.a4719dfa47.adf3e7e5ef.ddf2554a1e")
-            unavailability_message = unavailability_div.find_element(By.CSS_SELECTOR, "p.b99b6ef58f.c8075b5e6a").text
-            logger.info(f"Unavailability message detected: {unavailability_message}")
-            
-            result = {
-                "error": unavailability_message,
-                "availability": "Not available",
-                "hotel_name": "Unknown Hotel",
-                "price": None,
-                "taxes": None,
-                "currency": currency.upper(),
-                "checkin_date": checkin_date,
-                "checkout_date": checkout_date,
-                "room_type": "Standard Room",
-                "source_url": search_url
-            }
-            
-            if "2+ nights" in unavailability_message.lower():
-                result["alternative_dates"] = generate_alternative_dates(checkin_date, checkout_date)
-            
-            return result
-        except NoSuchElementException:
-            logger.info("No unavailability message found, proceeding with property card scraping")
-
-        hotel_card = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='property-card']"))
-        )
-        
-        hotel_name = hotel_card.find_element(By.CSS_SELECTOR, "div[data-testid='title']").text
-        rating = hotel_card.find_element(By.CSS_SELECTOR, "div[data-testid='review-score'] .dff2e52086").text
-        reviews = hotel_card.find_element(By.CSS_SELECTOR, "div[data-testid='review-score'] .fff1944c52.fb14de7f14.eaa8455879").text
-        location = hotel_card.find_element(By.CSS_SELECTOR, "span[data-testid='address']").text
-        distance = hotel_card.find_element(By.CSS_SELECTOR, "span[data-testid='distance']").text
-        availability_url = hotel_card.find_element(By.CSS_SELECTOR, "a[data-testid='availability-cta-btn']").get_attribute("href")
-        room_type = hotel_card.find_element(By.CSS_SELECTOR, "div[data-testid='recommended-units'] h4").text
-
-        try:
-            price_element = hotel_card.find_element(By.CSS_SELECTOR, "span[data-testid='price-and-discounted-price']")
-            price_text = price_element.text.replace("US$", "").replace("R", "").replace("ZAR", "").replace("£", "").replace("€", "").replace("A$", "").replace("฿", "").strip()
-            price = extract_price(price_text)
-            taxes_info = hotel_card.find_element(By.CSS_SELECTOR, "div[data-testid='taxes-and-charges']").text
-            taxes = 0 if "Includes taxes and charges" in taxes_info else None
-            availability = "Available" if price else "Not available"
-            detected_currency = detect_currency(driver.page_source, currency)
-        except NoSuchElementException:
-            logger.warning("Price element not found, checking for unavailability indicators")
-            price = None
-            taxes = None
-            availability = "Not available"
-            detected_currency = currency.upper()
-
+def parse_taxes(text):
+    return 0 if "Includes taxes and charges" in text else None
+
+PAGE_ROOTS = {
+    "unavailable": Root(UNAVAILABLE_SELECTOR, {
+        "message": Field(UNAVAILABLE_MESSAGE_SELECTOR, required=False),
+    }),
+    "card": Root(PROPERTY_CARD_SELECTOR, {
+        "hotel_name": Field(TITLE_SELECTOR),
+        "rating": Field(RATING_SELECTOR),
+        "reviews": Field(REVIEWS_SELECTOR),
+        "location": Field(ADDRESS_SELECTOR),
+        "distance_from_center": Field(DISTANCE_SELECTOR),
+        "source_url": Field(AVAILABILITY_LINK_SELECTOR, prop="href"),
+        "room_type": Field(ROOM_TYPE_SELECTOR),
+        "price": Field(PRICE_SELECTOR, transform=extract_price, required=False),
+        "taxes": Field(TAXES_SELECTOR, transform=parse_taxes, required=False),
+    }),
+}
+
+# A results page mixes new properties without reviews in with the rest, so only name and link are required
+LISTING_ROOTS = {
+    "cards": Root(PROPERTY_CARD_SELECTOR, {
+        "hotel_name": Field(TITLE_SELECTOR),
+        "rating": Field(RATING_SELECTOR, required=False),
+        "reviews": Field(REVIEWS_SELECTOR, required=False),
+        "location": Field(ADDRESS_SELECTOR, required=False),
+        "distance_from_center": Field(DISTANCE_SELECTOR, required=False),
+        "source_url": Field(AVAILABILITY_LINK_SELECTOR, prop="href"),
+        "room_type": Field(ROOM_TYPE_SELECTOR, required=False, default="Standard Room"),
+        "price": Field(PRICE_SELECTOR, transform=extract_price, required=False),
+        "taxes": Field(TAXES_SELECTOR, transform=parse_taxes, required=False),
+    }, many=True),
+}
+
+def build_booking_result(extracted, search_url, checkin_date, checkout_date, currency):
+    unavailable = extracted.get("unavailable")
+    if unavailable and unavailable.get("message"):
+        unavailability_message = unavailable["message"]
+        logger.info(f"Unavailability message detected: {unavailability_message}")
         result = {
-            "hotel_name": hotel_name,
-            "rating": rating,
-            "reviews": reviews,
-            "location": location,
-            "distance_from_center": distance,
-            "price": price,
-            "taxes": taxes,
-            "currency": detected_currency,
-            "availability": availability,
+            "error": unavailability_message,
+            "availability": "Not available",
+            "hotel_name": "Unknown Hotel",
+            "price": None,
+            "taxes": None,
+            "currency": currency.upper(),
             "checkin_date": checkin_date,
             "checkout_date": checkout_date,
-            "room_type": room_type,
-            "source_url": availability_url
+            "room_type": "Standard Room",
+            "source_url": search_url
         }
-        logger.info(f"Scraped data: {result}")
+        if "2+ nights" in unavailability_message.lower():
+            result["alternative_dates"] = generate_alternative_dates(checkin_date, checkout_date)
         return result
 
-    except Exception as e:
-        logger.error(f"Scraping error: {str(e)}")
-        with open('error_page_content.html', 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
-        return {"error": str(e)}
-
-def cleanup_driver():
-    global _driver
-    with _driver_lock:
-        if _driver is not None:
-            try:
-                _driver.quit()
-                _driver = None
-                logger.info("WebDriver instance manually closed")
-            except Exception:
-                pass
-
-import atexit
-atexit.register(cleanup_driver)
\ No newline at end of file
+    raw_card = extracted.get("card")
+    if raw_card is None:
+        return None
+    return card_result(raw_card, PAGE_ROOTS["card"].fields, checkin_date, checkout_date, currency)
+
+def card_result(raw_card, fields, checkin_date, checkout_date, currency):
+    card = require_fields(raw_card, fields, "property card")
+
+    if raw_card["price"] is None or raw_card["taxes"] is None:
+        logger.warning("Price element not found, checking for unavailability indicators")
+        price = None
+        taxes = None
+        detected_currency = currency.upper()
+    else:
+        price = card["price"]
+        taxes = card["taxes"]
+        detected_currency = detect_currency(raw_card["price"], currency)
+
+    return {
+        "hotel_name": card["hotel_name"],
+        "rating": card["rating"],
+        "reviews": card["reviews"],
+        "location": card["location"],
+        "distance_from_center": card["distance_from_center"],
+        "price": price,
+        "taxes": taxes,
+        "currency": detected_currency,
+        "availability": "Available" if price else "Not available",
+        "checkin_date": checkin_date,
+        "checkout_date": checkout_date,
+        "room_type": card["room_type"],
+        "source_url": card["source_url"]
+    }
+
+def build_booking_listing(extracted, search_url, checkin_date, checkout_date, currency):
+    cards = []
+    for raw_card in extracted.get("cards") or []:
+        try:
+            cards.append(card_result(raw_card, LISTING_ROOTS["cards"].fields, checkin_date, checkout_date, currency))
+        except ExtractionError as e:
+            logger.info(f"Skipping property card: {str(e)}")
+    return cards
+
+def listing_page_url(search_url, page):
+    parsed = urlparse(search_url)
+    query_params = parse_qs(parsed.query)
+    query_params['offset'] = [str(page * RESULTS_PER_PAGE)]
+    return urlunparse(parsed._replace(query=urlencode(query_params, doseq=True)))
+
+class BookingProvider(ScraperProvider):
+    name = "booking"
+    label = "Booking.com"
+    url_prefix = "https://www.booking.com"
+    default_currency = "ZAR"
+    ready_selectors = (PROPERTY_CARD_SELECTOR, UNAVAILABLE_SELECTOR)
+    card_selector = PROPERTY_CARD_SELECTOR
+    page_roots = PAGE_ROOTS
+    modify_hotel_url = staticmethod(modify_hotel_url)
+    build_result = staticmethod(build_booking_result)
+    listing_roots = LISTING_ROOTS
+    build_listing = staticmethod(build_booking_listing)
+    listing_page_url = staticmethod(listing_page_url)
+
+provider = register_provider(BookingProvider())
+
+def parse_booking_html(html, search_url, checkin_date, checkout_date, currency):
+    return provider.parse_html(html, search_url, checkin_date, checkout_date, currency)
+
+def scrape_booking_hotel(hotel_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD', child_ages='', deadline=None):
+    return scrape_hotel("booking", hotel_url, checkin_date, checkout_date, adults, children, rooms, currency, child_ages, deadline)
+
+def scrape_booking_listing(list_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD', child_ages='', deadline=None, pages=1, scrolls=0, max_hotels=None):
+    return scrape_listing("booking", list_url, checkin_date, checkout_date, adults, children, rooms, currency, child_ages, deadline, pages, scrolls, max_hotels)
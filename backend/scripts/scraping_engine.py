@@ -0,0 +1,580 @@
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import time
+import os
+import logging
+from scripts.driver_pool import DriverPool, PoolTimeoutError
+from scripts.http_fetch import try_fast_path
+from scripts.result_cache import canonical_hotel_url
+from scripts.resource_blocking import configure_chrome_options, apply_resource_blocking
+from scripts.debug_capture import capture_page
+from scripts.page_extraction import ExtractionError, extract_from_driver, extract_from_soup
+from scripts.money import parse_money
+from scripts.stub_scraper import STUB_ENABLED, StubDriver, stub_listing, stub_scrape
+from scripts.site_health import CircuitOpenError, Deadline, backoff_delay, get_site_health, resolve_deadline
+from scripts.metrics import SCRAPES, SCRAPE_FAILURES, SCRAPE_RETRIES, request_trace, stage_timer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Selenium, webdriver_manager and BeautifulSoup are imported where they are used so that importing the
+# app (and every gunicorn worker boot) does not pay for them before the first scrape needs them.
+# A pinned driver binary skips webdriver_manager's version lookup, which goes over the network.
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+CHROME_BINARY = os.getenv("CHROME_BINARY")
+
+# Upper bounds; once a site has enough samples its waits shrink to its observed load times
+PAGE_LOAD_TIMEOUT = 20
+CARD_TIMEOUT = 10
+MIN_PAGE_LOAD_TIMEOUT = 5
+MIN_CARD_TIMEOUT = 2
+MIN_ATTEMPT_SECONDS = 2
+MAX_RETRIES = 3
+SCROLL_TIMEOUT = 5
+MAX_LISTING_PAGES = 10
+MAX_LISTING_SCROLLS = 20
+MAX_LISTING_HOTELS = 500
+
+# Scrolls the last result card into view and reports how many cards are on the page
+SCROLL_SCRIPT = """
+const cards = document.querySelectorAll(arguments[0]);
+if (cards.length) cards[cards.length - 1].scrollIntoView({block: 'end'});
+window.scrollBy(0, window.innerHeight);
+return cards.length;
+"""
+
+_providers = {}
+_chromedriver_path = CHROMEDRIVER_PATH
+_chromedriver_lock = Lock()
+
+
+class ScraperProvider:
+    name = None
+    label = None
+    url_prefix = None
+    default_currency = "USD"
+    ready_selectors = ()
+    card_selector = None
+    page_roots = {}
+    listing_roots = {}
+
+    def modify_hotel_url(self, original_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD', child_ages=''):
+        raise NotImplementedError
+
+    def build_result(self, extracted, search_url, checkin_date, checkout_date, currency):
+        raise NotImplementedError
+
+    def error_result(self, message, search_url, checkin_date, checkout_date, currency):
+        return {"error": message}
+
+    def build_listing(self, extracted, search_url, checkin_date, checkout_date, currency):
+        raise NotImplementedError
+
+    def listing_page_url(self, search_url, page):
+        # URL of results page `page` (0-based), or None when the site only loads more results on scroll
+        return None
+
+    def parse_listing_html(self, html, search_url, checkin_date, checkout_date, currency):
+        from bs4 import BeautifulSoup
+        extracted = extract_from_soup(BeautifulSoup(html, "html.parser"), self.listing_roots, search_url)
+        cards = self.build_listing(extracted, search_url, checkin_date, checkout_date, currency)
+        # Unpriced cards in the raw HTML are usually priced by scripts, so let the browser try
+        if not cards or all(card["price"] is None for card in cards):
+            return None
+        return cards
+
+    def parse_html(self, html, search_url, checkin_date, checkout_date, currency):
+        from bs4 import BeautifulSoup
+        extracted = extract_from_soup(BeautifulSoup(html, "html.parser"), self.page_roots, search_url)
+        try:
+            result = self.build_result(extracted, search_url, checkin_date, checkout_date, currency)
+        except ExtractionError as e:
+            logger.info(f"[{self.name}] Raw HTML is incomplete: {str(e)}")
+            return None
+        # A card without a price in the raw HTML may still be priced once scripts run
+        if result is None or ('error' not in result and result["price"] is None):
+            return None
+        return result
+
+
+def register_provider(provider):
+    _providers[provider.name] = provider
+    return provider
+
+
+def get_provider(name):
+    return _providers[name]
+
+
+def resolve_chromedriver():
+    # Resolved once per process: CHROMEDRIVER_PATH when pinned, otherwise webdriver_manager's cache lookup
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            with stage_timer("driver_resolve"):
+                _chromedriver_path = ChromeDriverManager().install()
+            logger.info(f"Resolved ChromeDriver at {_chromedriver_path}; set CHROMEDRIVER_PATH to skip this lookup")
+        return _chromedriver_path
+
+def setup_driver(block_resources=None, headless=None, performance_log=False):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    try:
+        options = webdriver.ChromeOptions()
+        if CHROME_BINARY:
+            options.binary_location = CHROME_BINARY
+        options.add_argument('--ignore-certificate-errors')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--window-size=1920,1080')
+        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36')
+        options.add_argument('--disable-cache')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        configure_chrome_options(options, block_resources=block_resources, headless=headless)
+        if performance_log:
+            # CDP Network.* events, readable with driver.get_log('performance')
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+        service = Service(resolve_chromedriver())
+        driver = webdriver.Chrome(service=service, options=options)
+
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': '''
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                })
+            '''
+        })
+        apply_resource_blocking(driver, list(_providers), block_resources=block_resources)
+
+        logger.info(f"Initialized new WebDriver instance with ChromeDriver at {service.path}")
+        logger.info(f"Chrome version: {driver.capabilities['browserVersion']}")
+        logger.info(f"ChromeDriver version: {driver.capabilities['chrome']['chromedriverVersion']}")
+        return driver
+    except Exception as e:
+        logger.error(f"Failed to initialize WebDriver: {str(e)}")
+        raise
+
+_pool = DriverPool(StubDriver if STUB_ENABLED else setup_driver, name="browser")
+
+def prewarm_browsers(count=None):
+    # Launches browsers ahead of the first request, e.g. from the gunicorn post_fork hook
+    started = time.monotonic()
+    if not STUB_ENABLED:
+        resolve_chromedriver()
+    launched = _pool.prewarm(count)
+    logger.info(f"Pre-warmed {launched} browser(s) in {time.monotonic() - started:.1f}s")
+    return launched
+
+def extract_price(price_text):
+    return parse_money(price_text)[0]
+
+def detect_currency(price_text, requested_currency):
+    # Reads the currency marker of the price element itself, never the whole page
+    currency = parse_money(price_text)[1]
+    if currency is None:
+        logger.warning(f"No currency marker in {price_text!r}, defaulting to {requested_currency.upper()}")
+        return requested_currency.upper()
+    return currency
+
+def generate_alternative_dates(checkin_date, checkout_date):
+    try:
+        checkin_dt = datetime.strptime(checkin_date, '%Y-%m-%d').date()
+        checkout_dt = datetime.strptime(checkout_date, '%Y-%m-%d').date()
+        alternatives = []
+
+        if (checkout_dt - checkin_dt).days == 1:
+            new_checkout = checkin_dt + timedelta(days=2)
+            alternatives.append({
+                "checkin_date": checkin_dt.strftime('%Y-%m-%d'),
+                "checkout_date": new_checkout.strftime('%Y-%m-%d'),
+                "nights": 2,
+                "dates": f"{checkin_dt.strftime('%b %d')} - {new_checkout.strftime('%b %d')}",
+                "price": 0,
+                "taxes": 0,
+                "currency": "USD"
+            })
+        return alternatives
+    except ValueError:
+        logger.error("Invalid date format for alternative dates")
+        return []
+
+def validate_dates(checkin_date, checkout_date):
+    try:
+        checkin_dt = datetime.strptime(checkin_date, '%Y-%m-%d').date()
+        checkout_dt = datetime.strptime(checkout_date, '%Y-%m-%d').date()
+        if checkin_dt >= checkout_dt:
+            logger.error("Invalid dates: check-out must be after check-in")
+            return "Check-out date must be after check-in date"
+        if checkin_dt < datetime.now().date():
+            logger.error("Invalid dates: check-in date cannot be in the past")
+            return "Check-in date cannot be in the past"
+    except ValueError:
+        logger.error("Invalid date format")
+        return "Invalid date format, expected YYYY-MM-DD"
+    return None
+
+def scrape_hotel(provider_name, hotel_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD', child_ages='', deadline=None):
+    provider = get_provider(provider_name)
+    date_error = validate_dates(checkin_date, checkout_date)
+    if date_error:
+        return {"error": date_error}
+
+    deadline = Deadline(resolve_deadline(deadline))
+    health = get_site_health(provider.name)
+    try:
+        health.breaker.before_call()
+    except CircuitOpenError as e:
+        logger.warning(f"Failing fast: {str(e)}")
+        SCRAPE_FAILURES.inc(site=provider.name, reason="circuit_open")
+        return {"error": f"{provider.label} is temporarily unavailable, please try again shortly"}
+
+    logger.info(f"Processing {provider.label} dates: checkIn={checkin_date}, checkOut={checkout_date}, currency={currency}")
+
+    with request_trace(f"[{provider.name}] {checkin_date} → {checkout_date}"):
+        search_url = provider.modify_hotel_url(hotel_url, checkin_date, checkout_date, adults, children, rooms, currency, child_ages)
+        fast_result = None if STUB_ENABLED else _fast_path(provider, search_url, checkin_date, checkout_date, currency, deadline)
+        if fast_result is not None:
+            health.breaker.record_success()
+            return fast_result
+
+        try:
+            with _pool.driver(timeout=deadline.cap(_pool.checkout_timeout)) as driver:
+                return _scrape_page(provider, health, driver, search_url, checkin_date, checkout_date, currency, deadline)
+        except PoolTimeoutError as e:
+            health.breaker.release()
+            logger.error(f"Browser pool exhausted for {provider.label}: {str(e)}")
+            SCRAPE_FAILURES.inc(site=provider.name, reason="pool_timeout")
+            return {"error": "All scrapers are busy, please try again shortly"}
+        except Exception as e:
+            health.breaker.release()
+            logger.error(f"Failed to acquire a WebDriver: {str(e)}")
+            SCRAPE_FAILURES.inc(site=provider.name, reason="driver")
+            return {"error": str(e)}
+
+def _fast_path(provider, search_url, checkin_date, checkout_date, currency, deadline):
+    with stage_timer("fast_path", provider.name):
+        result = try_fast_path(
+            provider.name, search_url,
+            lambda html: provider.parse_html(html, search_url, checkin_date, checkout_date, currency),
+            timeout=deadline.remaining()
+        )
+    if result is not None:
+        SCRAPES.inc(site=provider.name, path="fast", outcome="error" if 'error' in result else "ok")
+    return result
+
+def scrape_hotel_dates(provider_name, hotel_url, stays, adults=2, children=0, rooms=1, currency='USD', child_ages='', deadline=None):
+    # Quotes several (checkin, checkout) stays of one hotel. Stays the fast path cannot answer are
+    # split across at most pool-size browser sessions, each reusing its warm driver for its whole slice.
+    provider = get_provider(provider_name)
+    deadline = Deadline(resolve_deadline(deadline))
+    health = get_site_health(provider.name)
+    results = {}
+    pending = []
+    for stay in stays:
+        date_error = validate_dates(*stay)
+        if date_error:
+            results[stay] = {"error": date_error}
+        else:
+            pending.append(stay)
+    if not pending:
+        return results
+
+    try:
+        health.breaker.before_call()
+    except CircuitOpenError as e:
+        logger.warning(f"Failing fast: {str(e)}")
+        SCRAPE_FAILURES.inc(amount=len(pending), site=provider.name, reason="circuit_open")
+        return {**results, **{stay: {"error": f"{provider.label} is temporarily unavailable, please try again shortly"} for stay in pending}}
+
+    search_urls = {
+        stay: provider.modify_hotel_url(hotel_url, stay[0], stay[1], adults, children, rooms, currency, child_ages)
+        for stay in pending
+    }
+
+    def fast_path(stay):
+        if STUB_ENABLED:
+            return None
+        return _fast_path(provider, search_urls[stay], stay[0], stay[1], currency, deadline)
+
+    with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+        for stay, result in zip(pending, executor.map(fast_path, pending)):
+            if result is not None:
+                results[stay] = result
+    remaining = [stay for stay in pending if stay not in results]
+    if len(remaining) < len(pending):
+        health.breaker.record_success()
+    if not remaining:
+        return results
+
+    def browser_session(chunk):
+        try:
+            with _pool.driver(timeout=deadline.cap(_pool.checkout_timeout)) as driver:
+                for stay in chunk:
+                    if deadline.remaining() < MIN_ATTEMPT_SECONDS:
+                        results[stay] = {"error": f"Request deadline of {deadline.seconds:g}s reached before this date was quoted"}
+                        continue
+                    results[stay] = _scrape_page(provider, health, driver, search_urls[stay], stay[0], stay[1], currency, deadline)
+        except PoolTimeoutError as e:
+            logger.error(f"Browser pool exhausted for {provider.label}: {str(e)}")
+            SCRAPE_FAILURES.inc(amount=len(chunk), site=provider.name, reason="pool_timeout")
+            for stay in chunk:
+                results.setdefault(stay, {"error": "All scrapers are busy, please try again shortly"})
+        except Exception as e:
+            logger.error(f"Failed to acquire a WebDriver: {str(e)}")
+            SCRAPE_FAILURES.inc(amount=len(chunk), site=provider.name, reason="driver")
+            for stay in chunk:
+                results.setdefault(stay, {"error": str(e)})
+
+    sessions = min(_pool.size, len(remaining))
+    logger.info(f"Quoting {len(remaining)} {provider.label} dates across {sessions} browser sessions")
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(browser_session, [remaining[i::sessions] for i in range(sessions)]))
+    health.breaker.release()
+    return results
+
+def scrape_listing(provider_name, list_url, checkin_date, checkout_date, adults=2, children=0, rooms=1, currency='USD', child_ages='', deadline=None, pages=1, scrolls=0, max_hotels=None):
+    # Destination mode: every property card on a search results page, from one page load per results page
+    provider = get_provider(provider_name)
+    date_error = validate_dates(checkin_date, checkout_date)
+    if date_error:
+        return {"error": date_error}
+
+    deadline = Deadline(resolve_deadline(deadline))
+    health = get_site_health(provider.name)
+    try:
+        health.breaker.before_call()
+    except CircuitOpenError as e:
+        logger.warning(f"Failing fast: {str(e)}")
+        SCRAPE_FAILURES.inc(site=provider.name, reason="circuit_open")
+        return {"error": f"{provider.label} is temporarily unavailable, please try again shortly"}
+
+    search_url = provider.modify_hotel_url(list_url, checkin_date, checkout_date, adults, children, rooms, currency, child_ages)
+    page_urls = [search_url]
+    for page in range(1, min(max(1, int(pages)), MAX_LISTING_PAGES)):
+        page_url = provider.listing_page_url(search_url, page)
+        if page_url is None:
+            break
+        page_urls.append(page_url)
+    scrolls = min(max(0, int(scrolls)), MAX_LISTING_SCROLLS)
+    max_hotels = min(max(1, int(max_hotels)), MAX_LISTING_HOTELS) if max_hotels else None
+
+    hotels = {}
+    errors = []
+
+    def add_cards(cards):
+        for card in cards:
+            # The same property can appear on two pages while results shift; keep its first card
+            card["hotel_url"] = canonical_hotel_url(card["source_url"])
+            hotels.setdefault(card["hotel_url"], card)
+
+    with request_trace(f"[{provider.name}] listing {checkin_date} → {checkout_date}"):
+        browser_urls = []
+        for page_url in page_urls:
+            cards = None
+            if not STUB_ENABLED and not scrolls:
+                cards = _listing_fast_path(provider, page_url, checkin_date, checkout_date, currency, deadline)
+            if cards is None:
+                browser_urls.append(page_url)
+            else:
+                add_cards(cards)
+        if len(browser_urls) < len(page_urls):
+            health.breaker.record_success()
+
+        if browser_urls:
+            try:
+                with _pool.driver(timeout=deadline.cap(_pool.checkout_timeout)) as driver:
+                    for page_url in browser_urls:
+                        if max_hotels and len(hotels) >= max_hotels:
+                            break
+                        if deadline.remaining() < MIN_ATTEMPT_SECONDS:
+                            errors.append(f"Request deadline of {deadline.seconds:g}s reached before {page_url} was loaded")
+                            break
+                        cards = _scrape_listing_page(provider, health, driver, page_url, checkin_date, checkout_date, currency, deadline, scrolls, max_hotels)
+                        if isinstance(cards, dict):
+                            errors.append(cards["error"])
+                            break
+                        add_cards(cards)
+            except PoolTimeoutError as e:
+                logger.error(f"Browser pool exhausted for {provider.label}: {str(e)}")
+                SCRAPE_FAILURES.inc(site=provider.name, reason="pool_timeout")
+                errors.append("All scrapers are busy, please try again shortly")
+            except Exception as e:
+                logger.error(f"Failed to acquire a WebDriver: {str(e)}")
+                SCRAPE_FAILURES.inc(site=provider.name, reason="driver")
+                errors.append(str(e))
+    health.breaker.release()
+
+    results = list(hotels.values())[:max_hotels] if max_hotels else list(hotels.values())
+    if not results and errors:
+        return {"error": errors[0]}
+    logger.info(f"Extracted {len(results)} {provider.label} properties from {len(page_urls)} results page(s)")
+    return {
+        "search_url": search_url,
+        "checkin_date": checkin_date,
+        "checkout_date": checkout_date,
+        "currency": currency.upper(),
+        "pages": len(page_urls),
+        "hotels": results,
+        "errors": errors
+    }
+
+def _listing_fast_path(provider, page_url, checkin_date, checkout_date, currency, deadline):
+    with stage_timer("fast_path", provider.name):
+        cards = try_fast_path(
+            provider.name, page_url,
+            lambda html: provider.parse_listing_html(html, page_url, checkin_date, checkout_date, currency),
+            timeout=deadline.remaining()
+        )
+    if cards is not None:
+        SCRAPES.inc(site=provider.name, path="fast", outcome="ok")
+    return cards
+
+def _scrape_listing_page(provider, health, driver, page_url, checkin_date, checkout_date, currency, deadline, scrolls, max_hotels):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    if STUB_ENABLED:
+        with stage_timer("stub_scrape", provider.name):
+            cards = stub_listing(provider, page_url, checkin_date, checkout_date, currency)
+        SCRAPES.inc(site=provider.name, path="stub", outcome="ok")
+        return cards
+    try:
+        logger.info(f"Loading results page: {page_url}")
+        _load_page(provider, health, driver, page_url, deadline)
+        capture_page(driver, provider.name, "listing")
+
+        # Results lists lazy-load more cards as they scroll into view
+        count = 0
+        for _ in range(scrolls):
+            if (max_hotels and count >= max_hotels) or deadline.remaining() < MIN_ATTEMPT_SECONDS:
+                break
+            count = driver.execute_script(SCROLL_SCRIPT, provider.card_selector)
+            try:
+                with stage_timer("scroll_wait", provider.name):
+                    WebDriverWait(driver, deadline.cap(SCROLL_TIMEOUT)).until(
+                        lambda d: d.execute_script(SCROLL_SCRIPT, provider.card_selector) > count
+                    )
+            except TimeoutException:
+                break
+
+        with stage_timer("extraction", provider.name):
+            extracted = extract_from_driver(driver, provider.listing_roots)
+            cards = provider.build_listing(extracted, page_url, checkin_date, checkout_date, currency)
+        health.breaker.record_success()
+        SCRAPES.inc(site=provider.name, path="browser", outcome="ok")
+        logger.info(f"Extracted {len(cards)} {provider.label} cards from {page_url}")
+        return cards
+
+    except Exception as e:
+        health.breaker.record_failure()
+        SCRAPES.inc(site=provider.name, path="browser", outcome="exception")
+        SCRAPE_FAILURES.inc(site=provider.name, reason=type(e).__name__)
+        logger.error(f"Listing scrape error: {str(e)}")
+        capture_page(driver, provider.name, "error", is_error=True)
+        return {"error": str(e)}
+
+def _load_page(provider, health, driver, search_url, deadline):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    wait_timeout = health.page_load.timeout(PAGE_LOAD_TIMEOUT, MIN_PAGE_LOAD_TIMEOUT, PAGE_LOAD_TIMEOUT)
+    for attempt in range(MAX_RETRIES):
+        budget = deadline.cap(wait_timeout)
+        if budget < MIN_ATTEMPT_SECONDS:
+            raise TimeoutError(f"Request deadline of {deadline.seconds:g}s reached before the page loaded")
+        started = time.monotonic()
+        try:
+            driver.set_page_load_timeout(budget)
+            with stage_timer("page_load", provider.name):
+                driver.get(search_url)
+            with stage_timer("ready_wait", provider.name):
+                WebDriverWait(driver, max(0.5, budget - (time.monotonic() - started))).until(
+                    EC.any_of(*[
+                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                        for selector in provider.ready_selectors
+                    ])
+                )
+            health.page_load.observe(time.monotonic() - started)
+            return
+        except Exception as e:
+            if isinstance(e, TimeoutException) and budget >= wait_timeout:
+                # The load took at least this long; counting only successes would let the timeout shrink but never grow
+                health.page_load.observe(time.monotonic() - started)
+            delay = backoff_delay(attempt)
+            if attempt == MAX_RETRIES - 1 or delay + MIN_ATTEMPT_SECONDS > deadline.remaining():
+                logger.error(f"Failed to load page after {attempt + 1} attempts: {str(e)}")
+                raise
+            logger.warning(f"Attempt {attempt + 1} failed after {budget:.1f}s budget, retrying in {delay:.1f}s...")
+            SCRAPE_RETRIES.inc(site=provider.name)
+            time.sleep(delay)
+
+def _scrape_page(provider, health, driver, search_url, checkin_date, checkout_date, currency, deadline):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    if STUB_ENABLED:
+        with stage_timer("stub_scrape", provider.name):
+            result = stub_scrape(provider, search_url, checkin_date, checkout_date, currency)
+        SCRAPES.inc(site=provider.name, path="stub", outcome="error" if 'error' in result else "ok")
+        return result
+    try:
+        logger.info(f"Loading hotel URL: {search_url}")
+        _load_page(provider, health, driver, search_url, deadline)
+        capture_page(driver, provider.name, "page")
+
+        with stage_timer("extraction", provider.name):
+            extracted = extract_from_driver(driver, provider.page_roots)
+            result = provider.build_result(extracted, search_url, checkin_date, checkout_date, currency)
+        if result is None:
+            adaptive_timeout = health.card_wait.timeout(CARD_TIMEOUT, MIN_CARD_TIMEOUT, CARD_TIMEOUT)
+            card_timeout = deadline.cap(adaptive_timeout)
+            if card_timeout <= 0:
+                raise TimeoutError(f"Request deadline of {deadline.seconds:g}s reached before the hotel card appeared")
+            logger.info(f"No unavailability message found, waiting up to {card_timeout:.1f}s for hotel card")
+            started = time.monotonic()
+            try:
+                with stage_timer("card_wait", provider.name):
+                    WebDriverWait(driver, card_timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, provider.card_selector))
+                    )
+            except TimeoutException:
+                if card_timeout >= adaptive_timeout:
+                    health.card_wait.observe(time.monotonic() - started)
+                raise
+            health.card_wait.observe(time.monotonic() - started)
+            with stage_timer("extraction", provider.name):
+                extracted = extract_from_driver(driver, provider.page_roots)
+                result = provider.build_result(extracted, search_url, checkin_date, checkout_date, currency)
+            if result is None:
+                raise ExtractionError("Hotel card disappeared before it could be read")
+
+        health.breaker.record_success()
+        SCRAPES.inc(site=provider.name, path="browser", outcome="error" if 'error' in result else "ok")
+        logger.info(
+            f"Scraped {provider.label}: {result.get('availability', 'error')}, "
+            f"{result.get('price')} {result.get('currency')} for {checkin_date} → {checkout_date}"
+        )
+        return result
+
+    except Exception as e:
+        health.breaker.record_failure()
+        SCRAPES.inc(site=provider.name, path="browser", outcome="exception")
+        SCRAPE_FAILURES.inc(site=provider.name, reason=type(e).__name__)
+        logger.error(f"Scraping error: {str(e)}")
+        capture_page(driver, provider.name, "error", is_error=True)
+        return provider.error_result(str(e), search_url, checkin_date, checkout_date, currency)
+
+def get_pool_stats():
+    return _pool.stats()
+
+def cleanup_driver():
+    _pool.close()
+
+import atexit
+atexit.register(cleanup_driver)
@@ -0,0 +1,70 @@
+from threading import Event, Lock
+import copy
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name="scrape"):
+        self.name = name
+        self._calls = {}
+        self._lock = Lock()
+        self.originated = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.originated += 1
+                leader = True
+
+        if not leader:
+            logger.info(f"[{self.name}] Joining in-flight request {key[:12]}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                logger.info(f"[{self.name}] Shared result of {key[:12]} with {call.waiters} waiting request(s)")
+            call.done.set()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def stats(self):
+        with self._lock:
+            total = self.originated + self.coalesced
+            return {
+                "in_flight": len(self._calls),
+                "originated": self.originated,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": round(self.coalesced / total, 3) if total else 0.0,
+            }
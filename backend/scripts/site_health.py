@@ -0,0 +1,182 @@
+from collections import deque
+from threading import Lock
+import logging
+import os
+import random
+import time
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("SCRAPE_DEADLINE_SECONDS", 45))
+MAX_DEADLINE_SECONDS = float(os.getenv("SCRAPE_MAX_DEADLINE_SECONDS", 120))
+# Adaptive wait = percentile of recent load times * headroom, clamped to [min, max]
+WAIT_PERCENTILE = float(os.getenv("SCRAPE_WAIT_PERCENTILE", 0.95))
+WAIT_HEADROOM = float(os.getenv("SCRAPE_WAIT_HEADROOM", 1.5))
+MIN_WAIT_SAMPLES = 20
+LATENCY_WINDOW = 200
+BACKOFF_BASE_SECONDS = float(os.getenv("SCRAPE_BACKOFF_BASE", 1.0))
+BACKOFF_CAP_SECONDS = float(os.getenv("SCRAPE_BACKOFF_CAP", 8.0))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("SCRAPE_BREAKER_FAILURES", 5))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("SCRAPE_BREAKER_COOLDOWN", 60))
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def cap(self, seconds):
+        return min(seconds, self.remaining())
+
+
+def resolve_deadline(seconds=None):
+    if seconds is None:
+        return DEFAULT_DEADLINE_SECONDS
+    return max(1.0, min(float(seconds), MAX_DEADLINE_SECONDS))
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_CAP_SECONDS):
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def timeout(self, default, minimum, maximum):
+        with self._lock:
+            enough = len(self._samples) >= MIN_WAIT_SAMPLES
+        if not enough:
+            return default
+        return max(minimum, min(maximum, self.percentile(WAIT_PERCENTILE) * WAIT_HEADROOM))
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = cooldown
+        self._lock = Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.trips = 0
+
+    def before_call(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._state == self.CLOSED:
+                return
+            # Half-open lets a single probe through; everyone else fails fast until it reports back
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(f"{self.name} is failing, retrying in {retry_in:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def release(self):
+        # The call ended without telling us anything about the site (e.g. no browser was free)
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                    logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+class SiteHealth:
+    def __init__(self, name):
+        self.name = name
+        self.page_load = LatencyTracker()
+        self.card_wait = LatencyTracker()
+        self.breaker = CircuitBreaker(name)
+
+    def stats(self):
+        return {
+            "page_load_samples": len(self.page_load),
+            "page_load_p50_seconds": _rounded(self.page_load.percentile(0.5)),
+            "page_load_p95_seconds": _rounded(self.page_load.percentile(0.95)),
+            "card_wait_p95_seconds": _rounded(self.card_wait.percentile(0.95)),
+            "breaker": self.breaker.stats(),
+        }
+
+
+def _rounded(value):
+    return round(value, 3) if value is not None else None
+
+
+_sites = {}
+_sites_lock = Lock()
+
+
+def get_site_health(name):
+    with _sites_lock:
+        if name not in _sites:
+            _sites[name] = SiteHealth(name)
+        return _sites[name]
+
+
+def get_site_health_stats():
+    with _sites_lock:
+        sites = dict(_sites)
+    return {name: health.stats() for name, health in sites.items()}
@@ -0,0 +1,124 @@
+from threading import Lock
+import logging
+import math
+import os
+import random
+import time
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Load testing only: replaces Chrome with a fake driver and a sleep drawn from a latency distribution
+STUB_ENABLED = os.getenv("SCRAPER_STUB", "0") == "1"
+# "fixed:SECONDS", "uniform:LOW,HIGH" or "lognormal:MEDIAN,SIGMA"
+STUB_LATENCY = os.getenv("SCRAPER_STUB_LATENCY", "lognormal:3,0.5")
+STUB_ERROR_RATE = float(os.getenv("SCRAPER_STUB_ERROR_RATE", 0.05))
+STUB_UNAVAILABLE_RATE = float(os.getenv("SCRAPER_STUB_UNAVAILABLE_RATE", 0.1))
+STUB_LAUNCH_SECONDS = float(os.getenv("SCRAPER_STUB_LAUNCH_SECONDS", 1.5))
+STUB_LISTING_CARDS = int(os.getenv("SCRAPER_STUB_LISTING_CARDS", 25))
+
+_stats_lock = Lock()
+_stats = {"scrapes": 0, "errors": 0, "unavailable": 0, "scrape_seconds": 0.0, "launches": 0}
+
+
+def parse_latency(spec):
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value.strip()]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"Invalid SCRAPER_STUB_LATENCY {spec!r}")
+
+
+sample_latency = parse_latency(STUB_LATENCY)
+
+
+class StubDriver:
+    current_url = "about:blank"
+
+    def __init__(self):
+        # Stands in for Chrome start-up so pool warm-up shows in the numbers
+        time.sleep(STUB_LAUNCH_SECONDS)
+        with _stats_lock:
+            _stats["launches"] += 1
+
+    def quit(self):
+        pass
+
+
+def stub_scrape(provider, search_url, checkin_date, checkout_date, currency):
+    latency = sample_latency()
+    time.sleep(latency)
+    roll = random.random()
+    with _stats_lock:
+        _stats["scrapes"] += 1
+        _stats["scrape_seconds"] += latency
+        if roll < STUB_ERROR_RATE:
+            _stats["errors"] += 1
+        elif roll < STUB_ERROR_RATE + STUB_UNAVAILABLE_RATE:
+            _stats["unavailable"] += 1
+    if roll < STUB_ERROR_RATE:
+        return provider.error_result("Stub scraper failure", search_url, checkin_date, checkout_date, currency)
+    if roll < STUB_ERROR_RATE + STUB_UNAVAILABLE_RATE:
+        return {
+            "error": "Stub: no availability for these dates",
+            "availability": "Not available",
+            "hotel_name": "Stub Hotel",
+            "price": None,
+            "taxes": None,
+            "currency": currency.upper(),
+            "checkin_date": checkin_date,
+            "checkout_date": checkout_date,
+            "room_type": "Standard Room",
+            "source_url": search_url
+        }
+    return {
+        "hotel_name": "Stub Hotel",
+        "price": round(random.uniform(50, 500), 2),
+        "taxes": 0,
+        "currency": currency.upper(),
+        "availability": "Available",
+        "checkin_date": checkin_date,
+        "checkout_date": checkout_date,
+        "room_type": "Standard Room",
+        "source_url": search_url
+    }
+
+
+def stub_listing(provider, search_url, checkin_date, checkout_date, currency):
+    latency = sample_latency()
+    time.sleep(latency)
+    with _stats_lock:
+        _stats["scrapes"] += 1
+        _stats["scrape_seconds"] += latency
+    cards = []
+    for i in range(STUB_LISTING_CARDS):
+        price = None if random.random() < STUB_UNAVAILABLE_RATE else round(random.uniform(50, 500), 2)
+        cards.append({
+            "hotel_name": f"Stub Hotel {i}",
+            "rating": None,
+            "reviews": None,
+            "price": price,
+            "taxes": 0 if price else None,
+            "currency": currency.upper(),
+            "availability": "Available" if price else "Not available",
+            "checkin_date": checkin_date,
+            "checkout_date": checkout_date,
+            "room_type": "Standard Room",
+            "source_url": f"{provider.url_prefix}/stub/hotel-{i}.html"
+        })
+    return cards
+
+
+def get_stub_stats():
+    with _stats_lock:
+        return {
+            "enabled": STUB_ENABLED,
+            "latency": STUB_LATENCY,
+            **_stats,
+            "scrape_seconds": round(_stats["scrape_seconds"], 3),
+        }
@@ -0,0 +1,9 @@
+import pytest
+
+from scripts.benchmark_money_parser import FIXTURES
+from scripts.money import parse_money
+
+
+@pytest.mark.parametrize("text, amount, currency", FIXTURES, ids=[repr(text) for text, _, _ in FIXTURES])
+def test_parse_money(text, amount, currency):
+    assert parse_money(text) == (amount, currency)
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from scripts import http_fetch
+from scripts.benchmark_replay import SITES
+from scripts.replay import ReplayServer, check_result, fixture_html, load_manifest
+
+MANIFEST = load_manifest()
+CHECKIN = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+CHECKOUT = (datetime.now() + timedelta(days=15)).strftime('%Y-%m-%d')
+
+
+@pytest.fixture(scope="module")
+def server():
+    with ReplayServer() as server:
+        yield server
+
+
+@pytest.mark.parametrize("entry", MANIFEST, ids=[entry["name"] for entry in MANIFEST])
+def test_parse_fixture(entry, server):
+    provider, _ = SITES[entry["site"]]
+    parsed = provider.parse_html(fixture_html(entry), server.url_for(entry), CHECKIN, CHECKOUT, entry["currency"])
+    if parsed is None:
+        pytest.skip("page needs the browser path to produce a result")
+    assert check_result(entry, parsed) == []
+
+
+@pytest.mark.parametrize("entry", MANIFEST, ids=[entry["name"] for entry in MANIFEST])
+def test_replay_fixture(entry, server, monkeypatch):
+    # End to end through the scraper the API calls, served by the HTTP fast path from the local stand-in
+    monkeypatch.setattr(http_fetch, "FAST_PATH_ENABLED", True)
+    _, scrape_fn = SITES[entry["site"]]
+    result = scrape_fn(server.url_for(entry), CHECKIN, CHECKOUT, currency=entry["currency"])
+    assert check_result(entry, result) == []
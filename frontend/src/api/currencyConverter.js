@@ -1,13 +1,29 @@
+import { fetchFxRates } from '../utils/api';
+
+// The backend serves a cached USD-based table; fetch it once per page load
+let ratesPromise = null;
+
+const getRates = () => {
+  if (!ratesPromise) {
+    ratesPromise = fetchFxRates()
+      .then(response => response.json())
+      .catch(error => {
+        ratesPromise = null;
+        throw error;
+      });
+  }
+  return ratesPromise;
+};
+
 export async function convertCurrency(amount, fromCurrency, toCurrency) {
   try {
-    const response = await fetch(`https://api.exchangerate-api.com/v4/latest/${fromCurrency}`);
-    const data = await response.json();
+    const data = await getRates();
     
-    if (!data.rates || !data.rates[toCurrency]) {
+    if (!data.rates || !data.rates[fromCurrency] || !data.rates[toCurrency]) {
       throw new Error('Invalid currency conversion');
     }
     
-    const rate = data.rates[toCurrency];
+    const rate = data.rates[toCurrency] / data.rates[fromCurrency];
     return (amount * rate).toFixed(2);
   } catch (error) {
     console.error('Currency conversion error:', error);
@@ -9,6 +9,7 @@ import LoadingSpinner from './LoadingSpinner';
 import InputNumber from 'rc-input-number';
 import 'rc-input-number/assets/index.css';
 import { debounce } from 'lodash';
+import { fetchQuote } from '../utils/api';
 
 const CACHE_KEY_PREFIX = 'comparison_cache_';
 const CACHE_TTL = 10 * 60 * 1500;
@@ -109,7 +110,6 @@ function ComparisonCard({ accommodation, isOpen, onClose }) {
       children,
       rooms,
       child_ages: childAges.length > 0 ? childAges.join(',') : undefined,
-      currency: currentCurrency,
     };
 
     const cacheKey = getCacheKey(hotelId, currentParams);
@@ -141,7 +141,20 @@ function ComparisonCard({ accommodation, isOpen, onClose }) {
 
     const timer = setTimeout(() => fetchPrices(true), 100);
     return () => clearTimeout(timer);
-  }, [isOpen, accommodation, currentCurrency]);
+  }, [isOpen, accommodation]);
+
+  // Quotes are kept in the currency they were scraped in, so a currency switch only re-converts them
+  useEffect(() => {
+    setDeals(originalDeals.map(deal => ({
+      ...deal,
+      price: parseFloat(convertAmount(deal.price, deal.currency)),
+      currency: currentCurrency,
+    })));
+    setAlternativeDates(originalAltDates.map(alt => ({
+      ...alt,
+      price: parseFloat(convertAmount((alt.price || 0) + (alt.taxes || 0), alt.currency || 'USD')),
+    })));
+  }, [originalDeals, originalAltDates, currentCurrency, convertAmount]);
 
   useEffect(() => {
     const tomorrow = new Date(checkIn);
@@ -165,7 +178,6 @@ function ComparisonCard({ accommodation, isOpen, onClose }) {
       children,
       rooms,
       child_ages: childAges.length > 0 ? childAges.join(',') : undefined,
-      currency: currentCurrency,
     };
 
     if (new Date(checkOutStr) <= new Date(checkInStr)) {
@@ -200,18 +212,16 @@ function ComparisonCard({ accommodation, isOpen, onClose }) {
 
       const responses = await Promise.all(
         sources.map(source =>
-          fetch(`http://localhost:5000/${source.endpoint}`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
-            body: JSON.stringify({
-              hotelUrl: source.url,
-              checkIn: currentParams.checkIn,
-              checkOut: currentParams.checkOut,
-              adults,
-              children,
-              rooms,
-              child_ages: currentParams.child_ages,
-            }),
+          fetchQuote(source.endpoint, {
+            hotelUrl: source.url,
+            checkIn: currentParams.checkIn,
+            checkOut: currentParams.checkOut,
+            adults,
+            children,
+            rooms,
+            child_ages: currentParams.child_ages,
+          }, {
+            headers: { 'Accept': 'application/json' },
             signal: abortControllerRef.current.signal,
           }).then(r => r.json().then(data => ({ source: source.name, data })))
         )
@@ -1,23 +1,25 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useCallback } from 'react';
 import { CurrencyContext } from './CurrencyContext';
+import { fetchFxRates } from '../utils/api';
 
 export function CurrencyProvider({ children }) {
   const [currentCurrency, setCurrentCurrency] = useState('USD');
   const [exchangeRates, setExchangeRates] = useState({});
   const [isLoading, setIsLoading] = useState(false);
 
+  // Rates come from the backend's cached table once per load; switching currency only re-renders
   useEffect(() => {
     const savedCurrency = localStorage.getItem('preferredCurrency');
     if (savedCurrency) {
       setCurrentCurrency(savedCurrency);
     }
     fetchExchangeRates();
-  }, [currentCurrency]);
+  }, []);
 
   const fetchExchangeRates = async () => {
     setIsLoading(true);
     try {
-      const response = await fetch(`https://api.exchangerate-api.com/v4/latest/USD`);
+      const response = await fetchFxRates();
       if (!response.ok) throw new Error('Failed to fetch exchange rates');
       const data = await response.json();
       setExchangeRates(data.rates || {});
@@ -36,7 +38,7 @@ export function CurrencyProvider({ children }) {
     }
   };
 
-  const convertAmount = (amount, fromCurrency = 'USD') => {
+  const convertAmount = useCallback((amount, fromCurrency = 'USD') => {
     if (!amount || isNaN(amount) || fromCurrency === currentCurrency || !exchangeRates[fromCurrency] || !exchangeRates[currentCurrency]) {
       console.log(`Conversion skipped: amount=${amount}, from=${fromCurrency}, to=${currentCurrency}, rates=${JSON.stringify(exchangeRates)}`);
       return amount ? amount.toFixed(2) : '0.00';
@@ -51,7 +53,7 @@ export function CurrencyProvider({ children }) {
     }
     console.log(`Converting ${amount} ${fromCurrency} to ${currentCurrency}: ${convertedAmount.toFixed(2)} (USD rate: ${usdRateFrom}, ${currentCurrency} rate: ${usdRateTo})`);
     return convertedAmount.toFixed(2);
-  };
+  }, [exchangeRates, currentCurrency]);
 
   const getCurrencySymbol = () => {
     const symbols = {
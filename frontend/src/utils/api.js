@@ -16,6 +16,57 @@ export const scrapeTrip = (data) =>
     body: JSON.stringify(data)
   });
 
+// GET form of scrape-booking / scrape-trip: sorted, blank-free params give every quote one cacheable URL
+export const fetchQuote = (endpoint, data, options = {}) => {
+  const params = new URLSearchParams(
+    Object.entries(data)
+      .filter(([, value]) => value !== undefined && value !== null && value !== '')
+      .map(([key, value]) => [key, key === 'currency' ? String(value).toUpperCase() : String(value)])
+      .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0))
+  );
+  return fetch(`${API_BASE}/${endpoint}?${params}`, options);
+};
+
+export const compareHotels = (hotels, spec) =>
+  fetch(`${API_BASE}/compare`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ...spec, hotels })
+  });
+
+export const fetchFxRates = () => fetch(`${API_BASE}/fx-rates`);
+
+export const fetchPriceCalendar = (site, data) =>
+  fetch(`${API_BASE}/price-calendar`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ...data, site })
+  });
+
+// Prices every property on a search results page, e.g. { listUrl, checkIn, checkOut, pages }
+export const fetchDestination = (site, data) =>
+  fetch(`${API_BASE}/scrape-destination`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ...data, site })
+  });
+
+// The same property on the other site, from listings indexed by destination scrapes
+export const fetchHotelMatch = (city, site, hotelUrl) =>
+  fetch(`${API_BASE}/hotel-matches?${new URLSearchParams({ city, site, hotelUrl })}`);
+
+// Delivers the refreshed payload of a background job, e.g. the events_url of a stale quote
+export const subscribeToJob = (eventsUrl, onResult) => {
+  const source = new EventSource(`${API_BASE}${eventsUrl}`);
+  source.addEventListener('done', (event) => {
+    onResult(JSON.parse(event.data).result);
+    source.close();
+  });
+  source.addEventListener('failed', () => source.close());
+  source.addEventListener('expired', () => source.close());
+  return source;
+};
+
 export async function translateText(text, targetLang) {
   const response = await fetch('/api/translate', {
     method: 'POST',